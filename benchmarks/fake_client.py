@@ -0,0 +1,303 @@
+"""A simulated Telegram client for offline benchmarks.
+
+FakeClient implements the subset of the Pyrogram API this bot calls. Every
+call sleeps for a configurable latency, media moves at a configurable
+bandwidth, and calls can fail or raise FloodWait at configurable rates.
+"""
+import asyncio
+import itertools
+import os
+import random
+from collections import Counter
+from dataclasses import dataclass
+from types import SimpleNamespace
+
+from pyrogram.errors import FloodWait
+
+CHUNK_SIZE = 1024 * 1024
+_ids = itertools.count(1_000_000)
+
+
+@dataclass
+class Profile:
+    latency: float = 0.05  # seconds per API call
+    bandwidth: float = 20 * 1024 * 1024  # bytes per second per transfer
+    fail_rate: float = 0.0  # share of calls failing with a generic error
+    copy_fail_rate: float = 0.0  # share of copy calls refused (e.g. forwarding restricted)
+    flood_rate: float = 0.0  # share of calls answered with FloodWait
+    flood_seconds: int = 2
+
+
+@dataclass
+class PostSpec:
+    kind: str  # text, photo, video, audio, document
+    size: int = 0
+    group_id: str = None
+
+
+class FakeChannel:
+    """A source chat whose posts are described by PostSpec entries keyed by message ID."""
+
+    def __init__(self, chat_id: int, posts: dict, protected: bool = False):
+        self.id = chat_id
+        self.posts = posts
+        self.protected = protected
+
+    @classmethod
+    def generate(cls, chat_id: int, count: int, first_id: int, mix: dict, sizes: dict,
+                 album_size: int = 3, protected: bool = False, seed: int = 1):
+        rng = random.Random(seed)
+        kinds, weights = zip(*mix.items())
+        posts = {}
+        msg_id = first_id
+        while msg_id < first_id + count:
+            kind = rng.choices(kinds, weights)[0]
+            if kind == "album":
+                group_id = f"g{msg_id}"
+                for _ in range(min(album_size, first_id + count - msg_id)):
+                    posts[msg_id] = PostSpec("photo", sizes["photo"], group_id)
+                    msg_id += 1
+                continue
+            posts[msg_id] = PostSpec(kind, sizes.get(kind, 0))
+            msg_id += 1
+        return cls(chat_id, posts, protected)
+
+    def delete_share(self, share: float, seed: int = 1) -> None:
+        """Delete about `share` of the posts, leaving gaps in the ID range."""
+        rng = random.Random(seed)
+        for msg_id in list(self.posts):
+            if rng.random() < share:
+                del self.posts[msg_id]
+
+
+class FakeMessage:
+    def __init__(self, client, chat_id: int, msg_id: int, spec: PostSpec = None, protected: bool = False, text: str = None):
+        self._client = client
+        self.id = msg_id
+        self.chat = SimpleNamespace(id=chat_id, has_protected_content=protected)
+        self.has_protected_content = protected
+        self.from_user = SimpleNamespace(id=chat_id)
+        self.empty = spec is None and text is None
+        self.message_thread_id = None
+        self.media_group_id = spec.group_id if spec else None
+        self.text = text
+        self.caption = None
+        self.entities = None
+        self.caption_entities = None
+        self.photo = self.video = self.audio = self.document = None
+        self.animation = self.voice = self.video_note = self.sticker = None
+        self.media = None
+        self._spec = spec
+
+        if spec is None:
+            return
+        if spec.kind == "text":
+            self.text = f"Post {msg_id}"
+            return
+
+        self.caption = f"Caption {msg_id}"
+        self.media = spec.kind
+        thumb = SimpleNamespace(file_id=f"thumb-{msg_id}", width=320, height=180, file_size=20_000)
+        media = SimpleNamespace(
+            file_id=f"file-{msg_id}", file_size=spec.size, mime_type=None,
+            file_name=None, duration=None, width=None, height=None,
+            performer=None, title=None, thumbs=[],
+        )
+        if spec.kind == "photo":
+            media.width, media.height = 1280, 720
+        elif spec.kind == "video":
+            media.file_name = f"{msg_id}.mp4"
+            media.duration, media.width, media.height = 60, 1280, 720
+            media.thumbs = [thumb]
+        elif spec.kind == "audio":
+            media.file_name = f"{msg_id}.mp3"
+            media.duration, media.performer, media.title = 180, "Artist", f"Track {msg_id}"
+        else:
+            media.file_name = f"{msg_id}.bin"
+        setattr(self, spec.kind, media)
+
+    # --- methods called on messages ---
+    async def download(self, file_name: str = None, progress=None, progress_args: tuple = ()):
+        return await self._client.download_media(self, file_name=file_name, progress=progress, progress_args=progress_args)
+
+    async def get_media_group(self):
+        return await self._client.get_media_group(self.chat.id, self.id)
+
+    async def reply(self, text, **kwargs):
+        return await self._client.send_message(self.chat.id, text)
+
+    async def edit(self, text, **kwargs):
+        await self._client._call("edit_message_text")
+        return self
+
+    async def delete(self):
+        await self._client._call("delete_messages")
+        return True
+
+
+class FakeClient:
+    def __init__(self, name: str, channels: dict, profile: Profile, is_bot: bool = False, seed: int = 1):
+        self.name = name
+        self.channels = channels
+        self.profile = profile
+        self.calls = Counter()
+        self.bytes_down = 0
+        self.bytes_up = 0
+        self.rng = random.Random(f"{name}-{seed}")
+        user_id = next(_ids)
+        self.me = SimpleNamespace(id=user_id, username=f"{name}_bot" if is_bot else name, is_premium=False)
+
+    async def _call(self, method: str, copy: bool = False):
+        self.calls[method] += 1
+        await asyncio.sleep(self.profile.latency)
+        roll = self.rng.random()
+        if roll < self.profile.flood_rate:
+            raise FloodWait(value=self.profile.flood_seconds)
+        if roll < self.profile.flood_rate + self.profile.fail_rate:
+            raise Exception(f"Simulated failure in {method}")
+        if copy and self.rng.random() < self.profile.copy_fail_rate:
+            raise Exception("CHAT_FORWARDS_RESTRICTED")
+
+    async def _transfer(self, size: int, progress=None, progress_args: tuple = ()):
+        done = 0
+        while done < size:
+            chunk = min(CHUNK_SIZE, size - done)
+            await asyncio.sleep(chunk / self.profile.bandwidth)
+            done += chunk
+            if progress:
+                await progress(done, size, *progress_args)
+
+    def _message(self, chat_id, msg_id):
+        channel = self.channels.get(chat_id)
+        spec = channel.posts.get(msg_id) if channel else None
+        return FakeMessage(self, chat_id, msg_id, spec, protected=bool(channel and channel.protected))
+
+    def _sent(self, chat_id, text=None):
+        return FakeMessage(self, chat_id, next(_ids), text=text or "")
+
+    # --- reads ---
+    async def get_me(self):
+        await self._call("get_me")
+        return self.me
+
+    async def get_chat(self, chat_id):
+        await self._call("get_chat")
+        return SimpleNamespace(id=chat_id)
+
+    async def get_messages(self, chat_id, message_ids, replies: int = 1):
+        await self._call("get_messages")
+        if isinstance(message_ids, int):
+            return self._message(chat_id, message_ids)
+        return [self._message(chat_id, msg_id) for msg_id in message_ids]
+
+    async def get_chat_history(self, chat_id, limit: int = 0):
+        await self._call("get_history")
+        ids = sorted(self.channels[chat_id].posts, reverse=True)
+        for msg_id in ids[:limit or None]:
+            yield self._message(chat_id, msg_id)
+
+    async def get_history_page(self, chat_id, after_id: int, max_id: int, thread_id: int = None, limit: int = 100):
+        # Stands in for helpers.history.get_history_page, which needs raw API access.
+        await self._call("get_history")
+        ids = [msg_id for msg_id in sorted(self.channels[chat_id].posts) if after_id < msg_id <= max_id]
+        return [self._message(chat_id, msg_id) for msg_id in ids[:limit]]
+
+    async def get_media_group(self, chat_id, message_id):
+        await self._call("get_media_group")
+        channel = self.channels[chat_id]
+        group_id = channel.posts[message_id].group_id
+        return [self._message(chat_id, i) for i, spec in sorted(channel.posts.items()) if spec.group_id == group_id]
+
+    # --- copies ---
+    async def copy_message(self, chat_id, from_chat_id, message_id, **kwargs):
+        await self._call("copy_message", copy=True)
+        return self._sent(chat_id)
+
+    async def copy_media_group(self, chat_id, from_chat_id, message_id, **kwargs):
+        await self._call("copy_media_group", copy=True)
+        group = await self.get_media_group(from_chat_id, message_id) if from_chat_id in self.channels else [None]
+        return [self._sent(chat_id) for _ in group]
+
+    async def forward_messages(self, chat_id, from_chat_id, message_ids, drop_author: bool = False, **kwargs):
+        await self._call("forward_messages", copy=True)
+        ids = [message_ids] if isinstance(message_ids, int) else message_ids
+        sent = [self._sent(chat_id) for _ in ids]
+        return sent[0] if isinstance(message_ids, int) else sent
+
+    async def forward_run(self, chat_id, from_chat_id, message_ids):
+        # Stands in for helpers.forward.forward_run; each post may be refused on its own.
+        await self._call("forward_messages")
+        return {
+            msg_id: next(_ids) for msg_id in message_ids
+            if self.rng.random() >= self.profile.copy_fail_rate
+        }
+
+    # --- transfers ---
+    async def download_media(self, message, file_name: str = None, in_memory: bool = False, progress=None, progress_args: tuple = ()):
+        await self._call("download_media")
+        if isinstance(message, str):
+            size = 20_000  # thumbnails are passed by file_id
+            name = f"{message}.jpg"
+        else:
+            media = getattr(message, message.media)
+            size = media.file_size
+            name = media.file_name or f"{message.id}.jpg"
+        await self._transfer(size, progress, progress_args)
+        self.bytes_down += size
+
+        if in_memory:
+            return SimpleNamespace(name=name, size=size)
+        if not file_name or file_name.endswith("/"):
+            file_name = os.path.join(file_name or "downloads", name)
+        os.makedirs(os.path.dirname(file_name) or ".", exist_ok=True)
+        with open(file_name, "wb") as f:
+            f.truncate(size)  # sparse: measure the bot, not the disk
+        return file_name
+
+    async def stream_media(self, message, limit: int = 0, offset: int = 0):
+        await self._call("get_file")
+        size = getattr(message, message.media).file_size
+        total_chunks = -(-size // CHUNK_SIZE)
+        last = total_chunks if not limit else min(total_chunks, offset + limit)
+        for index in range(offset, last):
+            chunk = min(CHUNK_SIZE, size - index * CHUNK_SIZE)
+            await asyncio.sleep(chunk / self.profile.bandwidth)
+            self.bytes_down += chunk
+            yield bytes(chunk)
+
+    async def _upload(self, method, chat_id, path, progress=None, progress_args: tuple = ()):
+        await self._call(method)
+        size = os.path.getsize(path) if isinstance(path, str) and os.path.exists(path) else 0
+        await self._transfer(size, progress, progress_args)
+        self.bytes_up += size
+        return self._sent(chat_id)
+
+    async def send_message(self, chat_id, text, **kwargs):
+        await self._call("send_message")
+        return self._sent(chat_id, text)
+
+    async def send_photo(self, chat_id, photo, caption: str = "", progress=None, progress_args: tuple = (), **kwargs):
+        return await self._upload("send_photo", chat_id, photo, progress, progress_args)
+
+    async def send_video(self, chat_id, video, progress=None, progress_args: tuple = (), **kwargs):
+        return await self._upload("send_video", chat_id, video, progress, progress_args)
+
+    async def send_audio(self, chat_id, audio, progress=None, progress_args: tuple = (), **kwargs):
+        return await self._upload("send_audio", chat_id, audio, progress, progress_args)
+
+    async def send_document(self, chat_id, document, progress=None, progress_args: tuple = (), **kwargs):
+        return await self._upload("send_document", chat_id, document, progress, progress_args)
+
+    async def send_media_group(self, chat_id, media, **kwargs):
+        await self._call("send_media_group")
+        sent = []
+        for item in media:
+            size = os.path.getsize(item.media) if os.path.exists(item.media) else 0
+            await self._transfer(size)
+            self.bytes_up += size
+            sent.append(self._sent(chat_id))
+        return sent
+
+    async def pin_chat_message(self, chat_id, message_id, **kwargs):
+        await self._call("pin_chat_message")
+        return True
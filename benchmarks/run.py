@@ -0,0 +1,178 @@
+"""Drive the bot's batch and single-post paths against simulated Telegram clients.
+
+Usage (from the repository root):
+
+    python benchmarks/run.py --posts 200 --mode batch --latency 0.05 --copy-fail 0.3
+
+Prints how many posts succeeded, were skipped or failed, items/s over the
+succeeded posts, media bytes/s, API calls per item and peak memory, so
+scheduler changes can be compared without live accounts or a network.
+"""
+import argparse
+import asyncio
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MB = 1024 * 1024
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("batch", "single"), default="batch",
+                        help="batch: one execute_batch_logic run; single: one handle_download per post, all at once")
+    parser.add_argument("--posts", type=int, default=100)
+    parser.add_argument("--sessions", type=int, default=1, help="user sessions in the pool")
+    parser.add_argument("--bots", type=int, default=1, help="bots in the pool")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per API call")
+    parser.add_argument("--bandwidth", type=float, default=20, help="MiB/s per transfer")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of API calls failing")
+    parser.add_argument("--copy-fail", type=float, default=0.0, help="share of copy calls refused")
+    parser.add_argument("--flood-rate", type=float, default=0.0, help="share of API calls answered with FloodWait")
+    parser.add_argument("--flood-seconds", type=int, default=2)
+    parser.add_argument("--protected", action="store_true", help="source forbids copying, forcing download & upload")
+    parser.add_argument("--mix", default="text=2,photo=3,video=2,document=2,audio=1,album=1",
+                        help="relative weights of post kinds")
+    parser.add_argument("--video-mb", type=float, default=30)
+    parser.add_argument("--document-mb", type=float, default=5)
+    parser.add_argument("--audio-mb", type=float, default=4)
+    parser.add_argument("--photo-mb", type=float, default=0.2)
+    parser.add_argument("--gaps", type=float, default=0.0, help="share of IDs in the range that were deleted")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--env", action="append", default=[], metavar="NAME=VALUE",
+                        help="override a PyroConf setting, e.g. --env BATCH_SIZE=20 (repeatable)")
+    return parser.parse_args()
+
+
+def prepare_environment(args, workdir):
+    # PyroConf reads the environment at import time, so this must run before main is imported.
+    os.environ.setdefault("BOT_TOKEN", "0:benchmark")
+    os.environ.setdefault("SESSION_STRING", "benchmark")
+    os.environ["DATABASE_PATH"] = os.path.join(workdir, "bench.db")
+    os.environ.setdefault("STREAM_UPLOADS", "False")
+    for item in args.env:
+        name, _, value = item.partition("=")
+        os.environ[name] = value
+
+    sys.path.insert(0, ROOT)
+    os.chdir(workdir)  # downloads/ and logs.txt go to the scratch directory
+
+
+async def run(args):
+    import logging
+    import main
+    from helpers import forward, history, journal
+    from helpers.pool import ClientPool
+    from benchmarks.fake_client import FakeChannel, FakeClient, FakeMessage, Profile
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    profile = Profile(
+        latency=args.latency,
+        bandwidth=args.bandwidth * MB,
+        fail_rate=args.fail_rate,
+        copy_fail_rate=args.copy_fail,
+        flood_rate=args.flood_rate,
+        flood_seconds=args.flood_seconds,
+    )
+    mix = dict((kind, float(weight)) for kind, weight in (part.split("=") for part in args.mix.split(",")))
+    sizes = {
+        "photo": int(args.photo_mb * MB),
+        "video": int(args.video_mb * MB),
+        "document": int(args.document_mb * MB),
+        "audio": int(args.audio_mb * MB),
+    }
+    first_id = 1000
+    channel = FakeChannel.generate(-1001234567890, args.posts, first_id, mix, sizes,
+                                   protected=args.protected, seed=args.seed)
+    channel.delete_share(args.gaps, seed=args.seed)
+    channels = {channel.id: channel}
+
+    users = [FakeClient(f"user_session_{i}", channels, profile, seed=args.seed) for i in range(args.sessions)]
+    bots = [FakeClient(f"media_bot_{i}", channels, profile, is_bot=True, seed=args.seed) for i in range(args.bots)]
+    main.user, main.bot = users[0], bots[0]
+    main.user_pool = ClientPool(users)
+    main.bot_pool = ClientPool(bots)
+    history.get_history_page = lambda client, *args, **kwargs: client.get_history_page(*args, **kwargs)
+    forward.forward_run = lambda client, *args, **kwargs: client.forward_run(*args, **kwargs)
+    await main.initialize()
+
+    bot = bots[0]
+    request = FakeMessage(bot, 4242, 1, text="/batch")
+    link_prefix = f"https://t.me/c/{str(channel.id)[4:]}"
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    if args.mode == "batch":
+        posts = args.posts
+        await main.execute_batch_logic(bot, request, f"{link_prefix}/{first_id}", args.posts)
+    else:
+        posts = len(channel.posts)
+        results = await asyncio.gather(*[
+            main.handle_download(bot, request, f"{link_prefix}/{msg_id}")
+            for msg_id in sorted(channel.posts)
+        ])
+    elapsed = time.perf_counter() - started
+    _, peak_traced = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Throughput only counts posts that made it; failures and aborts must not look fast.
+    if args.mode == "batch":
+        rows = journal.get_db().execute("SELECT status, count(*) FROM batch_items GROUP BY status").fetchall()
+        outcomes = Counter({status: total for status, total in rows})
+    else:
+        outcomes = Counter(result.get("status") if isinstance(result, dict) else result for result in results)
+    succeeded = outcomes["success"]
+    skipped = outcomes["skipped"]
+    failed = outcomes["failed"] + outcomes["error"]
+
+    clients = users + bots
+    calls = sum(sum(client.calls.values()) for client in clients)
+    by_method = {}
+    for client in clients:
+        for method, count in client.calls.items():
+            by_method[method] = by_method.get(method, 0) + count
+    bytes_down = sum(client.bytes_down for client in clients)
+    bytes_up = sum(client.bytes_up for client in clients)
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB -> MiB on Linux
+
+    return SimpleNamespace(
+        elapsed=elapsed, posts=posts, succeeded=succeeded, skipped=skipped, failed=failed,
+        unfinished=posts - succeeded - skipped - failed, calls=calls, by_method=by_method,
+        bytes_down=bytes_down, bytes_up=bytes_up,
+        peak_traced=peak_traced / MB, peak_rss=peak_rss,
+    )
+
+
+def report(args, result):
+    print(f"mode={args.mode} posts={result.posts} sessions={args.sessions} bots={args.bots} "
+          f"latency={args.latency}s bandwidth={args.bandwidth}MiB/s protected={args.protected}")
+    print(f"succeeded        {result.succeeded:10d}")
+    print(f"skipped          {result.skipped:10d}")
+    print(f"failed           {result.failed:10d}")
+    print(f"unfinished       {result.unfinished:10d}")
+    print(f"elapsed          {result.elapsed:10.2f} s")
+    print(f"items/s          {result.succeeded / result.elapsed:10.2f}")
+    print(f"download MiB/s   {result.bytes_down / MB / result.elapsed:10.2f}")
+    print(f"upload MiB/s     {result.bytes_up / MB / result.elapsed:10.2f}")
+    print(f"API calls/item   {result.calls / result.posts:10.2f}")
+    print(f"peak Python heap {result.peak_traced:10.1f} MiB")
+    print(f"peak RSS         {result.peak_rss:10.1f} MiB")
+    print("calls by method:")
+    for method, count in sorted(result.by_method.items(), key=lambda item: -item[1]):
+        print(f"  {method:<20}{count:>8}")
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    with tempfile.TemporaryDirectory(prefix="bot-bench-") as workdir:
+        prepare_environment(args, workdir)
+        result = asyncio.run(run(args))
+        os.chdir(ROOT)
+    report(args, result)
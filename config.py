@@ -19,9 +19,70 @@ class PyroConf(object):
     API_ID = int(getenv("API_ID", "6"))
     API_HASH = getenv("API_HASH", "eb06d4abfb49dc3eeb1aeb98ae0f581e")
     BOT_TOKEN = getenv("BOT_TOKEN")
+    # Optional extra bot tokens (comma separated); these bots must be admins in the destination
+    EXTRA_BOT_TOKENS = [t.strip() for t in getenv("EXTRA_BOT_TOKENS", "").split(",") if t.strip()]
     SESSION_STRING = getenv("SESSION_STRING")
+    # Optional extra user sessions (comma separated) to spread reads, copies and downloads
+    EXTRA_SESSION_STRINGS = [s.strip() for s in getenv("EXTRA_SESSION_STRINGS", "").split(",") if s.strip()]
     BOT_START_TIME = time()
 
+    # Posts being fetched and cloned at once
+    MAX_CONCURRENT_FETCHES = int(getenv("MAX_CONCURRENT_FETCHES", "5"))
+    # Files being downloaded at once (download & re-upload fallback)
     MAX_CONCURRENT_DOWNLOADS = int(getenv("MAX_CONCURRENT_DOWNLOADS", "3"))
+    # Downloaded files being probed / thumbnailed at once
+    MAX_CONCURRENT_PROCESSING = int(getenv("MAX_CONCURRENT_PROCESSING", "2"))
+    # ffprobe / ffmpeg processes allowed to run at once
+    FFMPEG_CONCURRENCY = int(getenv("FFMPEG_CONCURRENCY", "2"))
+    # Files being uploaded at once
+    MAX_CONCURRENT_UPLOADS = int(getenv("MAX_CONCURRENT_UPLOADS", "3"))
+    # Files allowed on disk between the start of their download and the end of their upload
+    MAX_STAGED_FILES = int(getenv("MAX_STAGED_FILES", "6"))
+    # Extra slots per stage that only single /dl or pasted-link posts may use
+    INTERACTIVE_RESERVED_SLOTS = int(getenv("INTERACTIVE_RESERVED_SLOTS", "1"))
     BATCH_SIZE = int(getenv("BATCH_SIZE", "10"))
-    FLOOD_WAIT_DELAY = int(getenv("FLOOD_WAIT_DELAY", "3"))
+    # Messages per get_messages call during batches (Telegram allows up to 200)
+    BATCH_FETCH_CHUNK_SIZE = min(int(getenv("BATCH_FETCH_CHUNK_SIZE", "50")), 200)
+    # How many fetched chunks the reader may keep queued ahead of the workers
+    BATCH_PREFETCH_CHUNKS = int(getenv("BATCH_PREFETCH_CHUNKS", "2"))
+    # Posts per forward call when a batch clones runs of posts server-side (max 100, 0 or 1 = one call per post)
+    BULK_CLONE_SIZE = min(int(getenv("BULK_CLONE_SIZE", "100")), 100)
+    # How batches find posts: "history" walks existing messages only, "ids" fetches every ID in the range
+    BATCH_ENUMERATION = getenv("BATCH_ENUMERATION", "history").lower()
+    # Seconds between updates of a batch's dashboard message
+    BATCH_DASHBOARD_INTERVAL = int(getenv("BATCH_DASHBOARD_INTERVAL", "10"))
+
+    # SQLite file holding the batch journal (keep it on a persistent volume)
+    DATABASE_PATH = getenv("DATABASE_PATH", "bot.db")
+    # Seconds to let in-flight batch items finish on SIGTERM before checkpointing
+    SHUTDOWN_DRAIN_TIMEOUT = int(getenv("SHUTDOWN_DRAIN_TIMEOUT", "8"))
+    # Re-probe the full clone order for a chat after this many uses of its learned path
+    CLONE_REPROBE_INTERVAL = int(getenv("CLONE_REPROBE_INTERVAL", "50"))
+    # Token-bucket budgets in calls per second, per client and method class.
+    # Buckets slow down automatically after a FloodWait and recover over time.
+    RATE_LIMIT_READ = float(getenv("RATE_LIMIT_READ", "5"))
+    RATE_LIMIT_COPY = float(getenv("RATE_LIMIT_COPY", "1"))
+    RATE_LIMIT_DOWNLOAD = float(getenv("RATE_LIMIT_DOWNLOAD", "2"))
+    RATE_LIMIT_UPLOAD = float(getenv("RATE_LIMIT_UPLOAD", "1"))
+    RATE_LIMIT_EDIT = float(getenv("RATE_LIMIT_EDIT", "1"))
+    RATE_LIMIT_BURST = float(getenv("RATE_LIMIT_BURST", "3"))
+    # Finished posts whose stage timings are kept in memory for /perf
+    PERF_LEDGER_SIZE = int(getenv("PERF_LEDGER_SIZE", "2000"))
+    # Optional JSONL file that every post's stage timings are appended to
+    PERF_LOG_PATH = getenv("PERF_LOG_PATH", "")
+    # Progress message edits per second across all transfers and bots
+    PROGRESS_EDIT_RATE = float(getenv("PROGRESS_EDIT_RATE", "2"))
+    # FloodWaits up to this many seconds pause the client and retry; longer ones stop the batch
+    FLOOD_WAIT_MAX_PAUSE = int(getenv("FLOOD_WAIT_MAX_PAUSE", "300"))
+    # How often a single post may be re-queued after a FloodWait before it counts as failed
+    FLOOD_WAIT_MAX_RETRIES = int(getenv("FLOOD_WAIT_MAX_RETRIES", "5"))
+    # Pipe large documents/videos/audio from download straight into the upload without disk
+    STREAM_UPLOADS = getenv("STREAM_UPLOADS", "False").lower() == "true"
+    # 512 KiB parts buffered in memory between the download and upload side of a stream
+    STREAM_BUFFER_PARTS = int(getenv("STREAM_BUFFER_PARTS", "16"))
+    # Byte ranges fetched at once for a single large download (1 = plain sequential download)
+    PARALLEL_DOWNLOAD_PARTS = int(getenv("PARALLEL_DOWNLOAD_PARTS", "4"))
+    # Files smaller than this (bytes) are downloaded sequentially
+    PARALLEL_DOWNLOAD_MIN_SIZE = int(getenv("PARALLEL_DOWNLOAD_MIN_SIZE", str(20 * 1024 * 1024)))
+    # Simultaneous media connections per user session, shared by all downloads of that session
+    MAX_CONCURRENT_TRANSMISSIONS = int(getenv("MAX_CONCURRENT_TRANSMISSIONS", "4"))
@@ -0,0 +1,56 @@
+from config import PyroConf
+from logger import LOGGER
+
+# Clone paths in the order they are probed, cheapest first.
+# "download" is the download & re-upload fallback.
+STRATEGIES = ("user", "bot", "relay", "download")
+
+# source chat id -> {"strategy": name, "uses": count since the last probe}
+STRATEGY_CACHE = {}
+
+
+def is_protected(chat_message) -> bool:
+    if getattr(chat_message, "has_protected_content", False):
+        return True
+    chat = getattr(chat_message, "chat", None)
+    return bool(chat and getattr(chat, "has_protected_content", False))
+
+
+def plan(chat_id, protected: bool = False) -> list:
+    """Return the clone paths to try for a source chat, best known path first."""
+    if protected:
+        # No copy or relay can succeed on a chat with forwarding restrictions.
+        return ["download"]
+
+    entry = STRATEGY_CACHE.get(chat_id)
+    if not entry:
+        return list(STRATEGIES)
+
+    entry["uses"] += 1
+    if entry["uses"] >= PyroConf.CLONE_REPROBE_INTERVAL:
+        # Periodically re-probe the full order in case a cheaper path works again.
+        entry["uses"] = 0
+        return list(STRATEGIES)
+
+    learned = entry["strategy"]
+    if learned == "download":
+        return ["download"]
+    return [learned] + [s for s in STRATEGIES if s != learned]
+
+
+def bulk_strategy(chat_id, protected: bool = False):
+    """Return the clone path ("user" or "bot") for forwarding runs of posts in one call, or None."""
+    if protected:
+        return None
+    entry = STRATEGY_CACHE.get(chat_id)
+    if not entry:
+        return "user"
+    return entry["strategy"] if entry["strategy"] in ("user", "bot") else None
+
+
+def record_success(chat_id, strategy: str) -> None:
+    entry = STRATEGY_CACHE.get(chat_id)
+    if entry and entry["strategy"] == strategy:
+        return
+    LOGGER(__name__).info(f"Clone strategy for {chat_id}: {strategy}")
+    STRATEGY_CACHE[chat_id] = {"strategy": strategy, "uses": 0}
@@ -4,6 +4,7 @@
 import os
 from typing import Optional
 
+from helpers.ratelimit import api_call
 from logger import LOGGER
 
 SIZE_UNITS = ["B", "KB", "MB", "GB", "TB", "PB"]
@@ -65,7 +66,7 @@ def get_readable_time(seconds: int) -> str:
 async def fileSizeLimit(file_size, message, action_type="download", is_premium=False):
     MAX_FILE_SIZE = 2 * 2097152000 if is_premium else 2097152000
     if file_size > MAX_FILE_SIZE:
-        await message.reply(
+        await api_call(message._client, "edit", message.reply,
             f"The file size exceeds the {get_readable_file_size(MAX_FILE_SIZE)} limit and cannot be {action_type}ed."
         )
         return False
@@ -0,0 +1,27 @@
+from pyrogram import raw
+
+
+async def forward_run(client, chat_id, from_chat_id, message_ids: list) -> dict:
+    """Forward a run of posts without their author in one call.
+
+    Returns {source_id: sent_id} for the posts Telegram actually forwarded.
+    Each post gets its own random_id and the reply's UpdateMessageID entries
+    pair them back, so posts Telegram refused are simply absent.
+    """
+    random_ids = [client.rnd_id() for _ in message_ids]
+    r = await client.invoke(
+        raw.functions.messages.ForwardMessages(
+            to_peer=await client.resolve_peer(chat_id),
+            from_peer=await client.resolve_peer(from_chat_id),
+            id=message_ids,
+            random_id=random_ids,
+            drop_author=True,
+        )
+    )
+
+    source_ids = dict(zip(random_ids, message_ids))
+    return {
+        source_ids[update.random_id]: update.id
+        for update in getattr(r, "updates", [])
+        if isinstance(update, raw.types.UpdateMessageID) and update.random_id in source_ids
+    }
@@ -0,0 +1,40 @@
+from pyrogram import raw, utils
+
+# Telegram returns at most 100 messages per history or replies request.
+HISTORY_PAGE_SIZE = 100
+
+
+async def get_top_message_id(client, chat_id) -> int:
+    """Return the ID of the newest message in the chat, or 0 if it has none."""
+    async for msg in client.get_chat_history(chat_id, limit=1):
+        return msg.id
+    return 0
+
+
+async def get_history_page(client, chat_id, after_id: int, max_id: int, thread_id: int = None, limit: int = HISTORY_PAGE_SIZE) -> list:
+    """Return up to `limit` existing messages with after_id < id <= max_id, oldest first.
+
+    With `thread_id`, only replies in that topic or discussion thread are returned.
+    Deleted IDs are simply absent, so sparse ranges cost one call per page of real messages.
+    """
+    # offset_id starts the window just above after_id; a negative add_offset walks it forward.
+    params = dict(
+        peer=await client.resolve_peer(chat_id),
+        offset_id=after_id + 1,
+        offset_date=0,
+        add_offset=-limit,
+        limit=limit,
+        max_id=max_id + 1,
+        min_id=after_id,
+        hash=0,
+    )
+    if thread_id:
+        request = raw.functions.messages.GetReplies(msg_id=thread_id, **params)
+    else:
+        request = raw.functions.messages.GetHistory(**params)
+
+    messages = await utils.parse_messages(client, await client.invoke(request), replies=0)
+    return sorted(
+        (msg for msg in messages if after_id < msg.id <= max_id),
+        key=lambda msg: msg.id,
+    )
@@ -0,0 +1,140 @@
+import asyncio
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from time import time
+
+# Priority lanes, highest first: single posts a user is waiting on, then batch items.
+INTERACTIVE = "interactive"
+BATCH = "batch"
+LANES = (INTERACTIVE, BATCH)
+
+# The user whose work the current task is doing; pipeline stages queue waiters per user.
+current_user = ContextVar("job_user", default=None)
+# The lane of the current task's work; anything not started interactively is batch work.
+current_lane = ContextVar("job_lane", default=BATCH)
+
+
+class FairSemaphore:
+    """A semaphore that hands freed slots to waiting users in round-robin order.
+
+    Each user has their own FIFO of waiters, so a user with thousands of
+    queued items gets one slot per turn, the same as a user with one.
+    Interactive waiters are always served before batch waiters, and
+    `reserved` extra slots on top of `value` are only given to them.
+    """
+
+    def __init__(self, value: int, reserved: int = 0):
+        self.value = value
+        self.reserved = reserved
+        self.holders = 0
+        self._queues = {lane: OrderedDict() for lane in LANES}  # lane -> user -> deque of waiters
+
+    def capacity(self, lane: str) -> int:
+        return self.value + (self.reserved if lane == INTERACTIVE else 0)
+
+    def waiting(self, lane: str) -> int:
+        return sum(len(queue) for queue in self._queues[lane].values())
+
+    def locked(self, lane: str = BATCH) -> bool:
+        if self.holders >= self.capacity(lane):
+            return True
+        # Nobody jumps ahead of waiters in the same or a higher lane.
+        for other in LANES:
+            if self._queues[other]:
+                return True
+            if other == lane:
+                return False
+        return False
+
+    async def acquire(self, user=None, lane: str = BATCH) -> None:
+        if not self.locked(lane):
+            self.holders += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues[lane].setdefault(user, deque()).append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we were cancelled; pass it on.
+                self.release()
+            else:
+                self._forget(lane, user, waiter)
+            raise
+
+    def release(self) -> None:
+        self.holders -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        for lane in LANES:
+            queues = self._queues[lane]
+            while queues and self.holders < self.capacity(lane):
+                user, queue = next(iter(queues.items()))
+                waiter = queue.popleft()
+                if queue:
+                    queues.move_to_end(user)
+                else:
+                    del queues[user]
+                if not waiter.done():
+                    self.holders += 1
+                    waiter.set_result(None)
+            if queues:
+                return  # lower lanes wait until this one is served
+
+    def _forget(self, lane: str, user, waiter) -> None:
+        queue = self._queues[lane].get(user)
+        if queue is None:
+            return
+        try:
+            queue.remove(waiter)
+        except ValueError:
+            pass
+        if not queue:
+            del self._queues[lane][user]
+        self._wake()
+
+
+class Job:
+    __slots__ = ("id", "user_id", "description", "task", "started", "progress")
+
+    def __init__(self, job_id: int, user_id: int, description: str):
+        self.id = job_id
+        self.user_id = user_id
+        self.description = description
+        self.task = None
+        self.started = time()
+        self.progress = None  # optional callable returning (done, total)
+
+
+# Background jobs by ID; batch jobs use their journal job ID.
+JOBS = {}
+
+
+async def run(job_id: int, user_id: int, description: str, coro):
+    """Run `coro` as job `job_id` on behalf of `user_id`; wrap it in a task to run it in the background."""
+    job = Job(job_id, user_id, description)
+    job.task = asyncio.current_task()
+    JOBS[job_id] = job
+    current_user.set(user_id)
+    try:
+        return await coro
+    finally:
+        JOBS.pop(job_id, None)
+
+
+def get(job_id: int):
+    return JOBS.get(job_id)
+
+
+def list_jobs(user_id: int = None) -> list:
+    return [job for job in JOBS.values() if user_id is None or job.user_id == user_id]
+
+
+def cancel(job_id: int) -> bool:
+    job = JOBS.get(job_id)
+    if job is None or job.task is None or job.task.done():
+        return False
+    job.task.cancel()
+    return True
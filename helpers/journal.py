@@ -0,0 +1,147 @@
+import os
+import sqlite3
+from time import time
+from typing import Optional
+
+from config import PyroConf
+from logger import LOGGER
+
+# Job statuses:
+#   running   - being processed, or interrupted by a restart (auto-resumed on startup)
+#   stopped   - halted by a FloodWait or error (resumable with /resume)
+#   completed - finished, nothing left to do
+JOB_RUNNING = "running"
+JOB_STOPPED = "stopped"
+JOB_COMPLETED = "completed"
+
+_conn: Optional[sqlite3.Connection] = None
+
+
+def get_db() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        folder = os.path.dirname(PyroConf.DATABASE_PATH)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        _conn = sqlite3.connect(PyroConf.DATABASE_PATH, isolation_level=None)
+        _conn.row_factory = sqlite3.Row
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute("PRAGMA synchronous=NORMAL")
+        _create_tables(_conn)
+        LOGGER(__name__).info(f"Journal database opened: {PyroConf.DATABASE_PATH}")
+    return _conn
+
+
+def _create_tables(conn: sqlite3.Connection) -> None:
+    conn.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS batch_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            request_chat_id INTEGER NOT NULL,
+            start_link TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            destination INTEGER NOT NULL,
+            pin_first INTEGER NOT NULL DEFAULT 0,
+            force INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS batch_items (
+            job_id INTEGER NOT NULL,
+            msg_id INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            sent_msg_id INTEGER,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (job_id, msg_id)
+        );
+        CREATE TABLE IF NOT EXISTS clone_index (
+            source_chat_id INTEGER NOT NULL,
+            msg_id INTEGER NOT NULL,
+            destination INTEGER NOT NULL,
+            sent_msg_id INTEGER NOT NULL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (source_chat_id, msg_id, destination)
+        );
+        """
+    )
+
+
+def close_db() -> None:
+    global _conn
+    if _conn is not None:
+        _conn.close()
+        _conn = None
+
+
+def create_job(user_id: int, request_chat_id: int, start_link: str, count: int, destination: int, pin_first: bool, force: bool = False) -> int:
+    now = time()
+    cur = get_db().execute(
+        "INSERT INTO batch_jobs (user_id, request_chat_id, start_link, count, destination, pin_first, force, status, created_at, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (user_id, request_chat_id, start_link, count, destination, int(pin_first), int(force), JOB_RUNNING, now, now),
+    )
+    return cur.lastrowid
+
+
+def get_job(job_id: int) -> Optional[sqlite3.Row]:
+    return get_db().execute("SELECT * FROM batch_jobs WHERE id = ?", (job_id,)).fetchone()
+
+
+def set_job_status(job_id: int, status: str) -> None:
+    get_db().execute(
+        "UPDATE batch_jobs SET status = ?, updated_at = ? WHERE id = ?",
+        (status, time(), job_id),
+    )
+
+
+def get_unfinished_jobs(user_id: Optional[int] = None, status: Optional[str] = None) -> list:
+    query = "SELECT * FROM batch_jobs WHERE status != ?"
+    params = [JOB_COMPLETED]
+    if user_id is not None:
+        query += " AND user_id = ?"
+        params.append(user_id)
+    if status is not None:
+        query += " AND status = ?"
+        params.append(status)
+    return get_db().execute(query + " ORDER BY id", params).fetchall()
+
+
+def record_item(job_id: int, msg_id: int, status: str, sent_msg_id: Optional[int] = None) -> None:
+    get_db().execute(
+        "INSERT OR REPLACE INTO batch_items (job_id, msg_id, status, sent_msg_id, updated_at) VALUES (?, ?, ?, ?, ?)",
+        (job_id, msg_id, status, sent_msg_id, time()),
+    )
+
+
+def record_items(job_id: int, msg_ids: list, status: str) -> None:
+    now = time()
+    get_db().executemany(
+        "INSERT OR REPLACE INTO batch_items (job_id, msg_id, status, sent_msg_id, updated_at) VALUES (?, ?, ?, NULL, ?)",
+        [(job_id, msg_id, status, now) for msg_id in msg_ids],
+    )
+
+
+def get_item_records(job_id: int) -> dict:
+    """Return {msg_id: (status, sent_msg_id)} for every committed item of a job."""
+    rows = get_db().execute(
+        "SELECT msg_id, status, sent_msg_id FROM batch_items WHERE job_id = ?", (job_id,)
+    ).fetchall()
+    return {row["msg_id"]: (row["status"], row["sent_msg_id"]) for row in rows}
+
+
+def get_clone(source_chat_id: int, msg_id: int, destination: int) -> Optional[int]:
+    """Return the destination message ID of an already mirrored post, if any."""
+    row = get_db().execute(
+        "SELECT sent_msg_id FROM clone_index WHERE source_chat_id = ? AND msg_id = ? AND destination = ?",
+        (source_chat_id, msg_id, destination),
+    ).fetchone()
+    return row["sent_msg_id"] if row else None
+
+
+def record_clone(source_chat_id: int, msg_id: int, destination: int, sent_msg_id: int) -> None:
+    get_db().execute(
+        "INSERT OR REPLACE INTO clone_index (source_chat_id, msg_id, destination, sent_msg_id, updated_at) VALUES (?, ?, ?, ?, ?)",
+        (source_chat_id, msg_id, destination, sent_msg_id, time()),
+    )
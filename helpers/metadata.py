@@ -0,0 +1,184 @@
+import os
+import json
+import asyncio
+from time import monotonic
+from uuid import uuid4
+from collections import OrderedDict
+from asyncio.subprocess import PIPE
+from asyncio import create_subprocess_exec, create_subprocess_shell, wait_for
+
+from config import PyroConf
+from helpers.metrics import FFMPEG_SECONDS
+from helpers.probe import read_header_info
+from helpers.ratelimit import api_call
+from logger import LOGGER
+
+# Caps ffprobe/ffmpeg processes across all uploads, however wide the batch.
+FFMPEG_SEMAPHORE = asyncio.Semaphore(PyroConf.FFMPEG_CONCURRENCY)
+
+# (path, size, mtime_ns) -> (duration, artist, title, width, height)
+PROBE_CACHE = OrderedDict()
+PROBE_CACHE_SIZE = 256
+
+EMPTY_INFO = (0, None, None, None, None)
+
+
+async def cmd_exec(cmd, shell=False):
+    if shell:
+        proc = await create_subprocess_shell(cmd, stdout=PIPE, stderr=PIPE)
+    else:
+        proc = await create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
+
+    stdout, stderr = await proc.communicate()
+
+    try:
+        stdout = stdout.decode().strip()
+    except Exception:
+        stdout = "Unable to decode the response!"
+
+    try:
+        stderr = stderr.decode().strip()
+    except Exception:
+        stderr = "Unable to decode the error!"
+
+    return stdout, stderr, proc.returncode
+
+
+def _cache_key(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return path, stat.st_size, stat.st_mtime_ns
+
+
+async def get_media_info(path):
+    """Return (duration, artist, title, width, height), probing each file only once."""
+    key = _cache_key(path)
+    if key in PROBE_CACHE:
+        PROBE_CACHE.move_to_end(key)
+        return PROBE_CACHE[key]
+
+    # Common containers are read in-process from their headers; ffprobe handles the rest.
+    info = await asyncio.to_thread(read_header_info, path) if key else None
+    if info is None:
+        info = await _ffprobe(path)
+
+    if key is not None:
+        PROBE_CACHE[key] = info
+        if len(PROBE_CACHE) > PROBE_CACHE_SIZE:
+            PROBE_CACHE.popitem(last=False)
+    return info
+
+
+async def _ffprobe(path):
+    try:
+        async with FFMPEG_SEMAPHORE:
+            started = monotonic()
+            result = await cmd_exec([
+                "ffprobe", "-hide_banner", "-loglevel", "error",
+                "-print_format", "json", "-show_format", "-show_streams", path,
+            ])
+            FFMPEG_SECONDS.labels(tool="ffprobe").observe(monotonic() - started)
+    except Exception as e:
+        LOGGER(__name__).error(f"Get Media Info: {e}. File: {path}")
+        return EMPTY_INFO
+
+    if result[0] and result[2] == 0:
+        try:
+            data = json.loads(result[0])
+
+            fields = data.get("format", {})
+            duration = round(float(fields.get("duration", 0)))
+
+            tags = fields.get("tags", {})
+            artist = tags.get("artist") or tags.get("ARTIST") or tags.get("Artist")
+            title = tags.get("title") or tags.get("TITLE") or tags.get("Title")
+
+            width = None
+            height = None
+            for stream in data.get("streams", []):
+                if stream.get("codec_type") == "video":
+                    width = stream.get("width")
+                    height = stream.get("height")
+                    break
+
+            return duration, artist, title, width, height
+        except Exception as e:
+            LOGGER(__name__).error(f"Error parsing media info: {e}")
+            return EMPTY_INFO
+
+    return EMPTY_INFO
+
+
+async def get_video_thumbnail(video_file, duration):
+    """Grab a frame from the middle of the video into a thumbnail file unique to this call.
+
+    The caller removes the returned file once the upload is done.
+    """
+    folder = os.path.dirname(video_file) or "."
+    output = os.path.join(folder, f"thumb_{uuid4().hex}.jpg")
+
+    if duration is None:
+        duration = (await get_media_info(video_file))[0]
+
+    if not duration:
+        duration = 3
+
+    duration //= 2
+
+    cmd = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error",
+        "-ss", str(duration), "-i", video_file,
+        "-vframes", "1", "-q:v", "2",
+        "-y", output,
+    ]
+
+    try:
+        async with FFMPEG_SEMAPHORE:
+            started = monotonic()
+            _, err, code = await wait_for(cmd_exec(cmd), timeout=60)
+            FFMPEG_SECONDS.labels(tool="ffmpeg").observe(monotonic() - started)
+        if code != 0 or not os.path.exists(output):
+            LOGGER(__name__).warning(f"Thumbnail generation failed: {err}")
+            return None
+    except Exception as e:
+        LOGGER(__name__).warning(f"Thumbnail generation error: {e}")
+        if os.path.exists(output):
+            os.remove(output)
+        return None
+
+    return output
+
+
+def pick_source_thumb(media):
+    """Return the best thumbnail Telegram already has for `media`, if any."""
+    thumbs = [t for t in (getattr(media, "thumbs", None) or []) if getattr(t, "file_id", None)]
+    if not thumbs:
+        return None
+    # Uploaded thumbnails may be at most 320px on the long side.
+    fitting = [t for t in thumbs if max(t.width or 0, t.height or 0) <= 320]
+    return max(fitting, key=lambda t: t.width or 0) if fitting else thumbs[0]
+
+
+async def download_source_thumb(chat_message, media_type, next_to=None):
+    """Download the source post's own thumbnail instead of extracting a frame.
+
+    With `next_to` the thumbnail is saved beside that file, otherwise it is
+    returned in memory. Returns None when there is no usable thumbnail.
+    """
+    thumb = pick_source_thumb(getattr(chat_message, media_type, None))
+    if thumb is None:
+        return None
+
+    client = chat_message._client
+    kwargs = {"in_memory": True}
+    if next_to:
+        folder = os.path.dirname(os.path.abspath(next_to))
+        kwargs = {"file_name": os.path.join(folder, f"thumb_{uuid4().hex}.jpg")}
+
+    try:
+        return await api_call(client, "download", client.download_media, thumb.file_id, **kwargs)
+    except Exception as e:
+        LOGGER(__name__).info(f"Source thumbnail unavailable, falling back: {e}")
+        return None
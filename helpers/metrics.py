@@ -0,0 +1,87 @@
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+from helpers.jobs import LANES
+
+# Buckets cover quick API calls up to multi-minute transfers of large files.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+ITEMS = Counter(
+    "bot_items_total",
+    "Posts handled, by the clone path that finished them and the result",
+    ["path", "result"],
+)
+ITEM_SECONDS = Histogram(
+    "bot_item_seconds",
+    "End-to-end time to handle one post, per priority lane",
+    ["lane", "path"],
+    buckets=LATENCY_BUCKETS,
+)
+CLONE_ATTEMPTS = Counter(
+    "bot_clone_attempts_total",
+    "Clone attempts per path and whether they worked",
+    ["path", "result"],
+)
+BYTES = Counter(
+    "bot_media_bytes_total",
+    "Media bytes moved through the bot",
+    ["direction"],
+)
+STAGE_SECONDS = Histogram(
+    "bot_stage_seconds",
+    "Time an item holds a slot in each pipeline stage",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+STAGE_WAIT_SECONDS = Histogram(
+    "bot_stage_wait_seconds",
+    "Time an item waits for a slot in each pipeline stage, per priority lane",
+    ["stage", "lane"],
+    buckets=LATENCY_BUCKETS,
+)
+STAGE_ACTIVE = Gauge("bot_stage_active", "Items holding a slot in each stage", ["stage"])
+STAGE_WAITING = Gauge("bot_stage_waiting", "Items queued for a slot in each stage", ["stage"])
+STAGE_LIMIT = Gauge("bot_stage_limit", "Configured slots per stage", ["stage"])
+STAGE_RESERVED = Gauge("bot_stage_reserved", "Extra slots per stage reserved for interactive items", ["stage"])
+LANE_WAITING = Gauge("bot_lane_waiting", "Items queued for a stage slot, per priority lane", ["stage", "lane"])
+CLIENT_ACTIVE = Gauge("bot_client_active_items", "Items currently assigned to each client", ["client"])
+RUNNING_TASKS = Gauge("bot_running_tasks", "Background download tasks currently running")
+ACTIVE_BATCHES = Gauge("bot_active_batches", "Batch jobs currently running")
+FLOOD_WAITS = Counter("bot_flood_waits_total", "FloodWait errors received", ["client"])
+FLOOD_WAIT_SECONDS = Counter("bot_flood_wait_seconds_total", "Seconds of FloodWait imposed", ["client"])
+FFMPEG_SECONDS = Histogram(
+    "bot_ffmpeg_seconds",
+    "Run time of ffprobe / ffmpeg processes",
+    ["tool"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+
+def record_item(path: str, status: str, seconds: float, lane: str) -> None:
+    ITEMS.labels(path=path, result=status).inc()
+    if status == "success":
+        ITEM_SECONDS.labels(lane=lane, path=path).observe(seconds)
+
+
+def watch_stages(stages: dict) -> None:
+    """Expose the live occupancy of every pipeline stage."""
+    for name, stage in stages.items():
+        STAGE_ACTIVE.labels(stage=name).set_function(lambda stage=stage: stage.active)
+        STAGE_WAITING.labels(stage=name).set_function(lambda stage=stage: stage.waiting)
+        STAGE_LIMIT.labels(stage=name).set(stage.limit)
+        STAGE_RESERVED.labels(stage=name).set(stage.reserved)
+        for lane in LANES:
+            LANE_WAITING.labels(stage=name, lane=lane).set_function(
+                lambda stage=stage, lane=lane: stage.semaphore.waiting(lane)
+            )
+
+
+def watch_pool(pool) -> None:
+    for client in pool.clients:
+        CLIENT_ACTIVE.labels(client=client.name).set_function(
+            lambda name=client.name: pool.active[name]
+        )
+
+
+def render() -> tuple:
+    """Return (body, content type) for the /metrics endpoint."""
+    return generate_latest(), CONTENT_TYPE_LATEST
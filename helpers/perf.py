@@ -0,0 +1,113 @@
+import json
+import math
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import monotonic, time
+
+from config import PyroConf
+from logger import LOGGER
+
+# Finished items, newest last; each is a dict as written to PERF_LOG_PATH.
+LEDGER = deque(maxlen=PyroConf.PERF_LEDGER_SIZE)
+
+# The item being handled by the current task, so nested helpers can time themselves.
+_current_item = ContextVar("perf_item", default=None)
+
+
+class ItemTimer:
+    __slots__ = ("url", "job_id", "started", "stages")
+
+    def __init__(self, url: str, job_id=None):
+        self.url = url
+        self.job_id = job_id
+        self.started = monotonic()
+        self.stages = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+
+def start_item(url: str, job_id=None):
+    """Begin timing a post; returns (timer, token) for finish_item."""
+    timer = ItemTimer(url, job_id)
+    return timer, _current_item.set(timer)
+
+
+def add(name: str, seconds: float) -> None:
+    timer = _current_item.get()
+    if timer is not None:
+        timer.add(name, seconds)
+
+
+@contextmanager
+def stage(name: str):
+    started = monotonic()
+    try:
+        yield
+    finally:
+        add(name, monotonic() - started)
+
+
+def finish_item(timer: ItemTimer, token, path: str, status: str) -> None:
+    _current_item.reset(token)
+    record = {
+        "time": round(time(), 3),
+        "job_id": timer.job_id,
+        "url": timer.url,
+        "path": path,
+        "status": status,
+        "total": round(monotonic() - timer.started, 3),
+        "stages": {name: round(seconds, 3) for name, seconds in timer.stages.items()},
+    }
+    LEDGER.append(record)
+
+    if PyroConf.PERF_LOG_PATH:
+        try:
+            with open(PyroConf.PERF_LOG_PATH, "a") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            LOGGER(__name__).warning(f"Could not write perf log: {e}")
+
+
+def percentile(values: list, pct: float) -> float:
+    # Nearest-rank percentile of an already sorted list.
+    return values[max(0, math.ceil(pct / 100 * len(values)) - 1)]
+
+
+def recent_records(jobs: int) -> list:
+    """Records of the last `jobs` batch jobs, plus single downloads made since the oldest of them."""
+    job_ids = []
+    for record in reversed(LEDGER):
+        job_id = record["job_id"]
+        if job_id is not None and job_id not in job_ids:
+            job_ids.append(job_id)
+            if len(job_ids) == jobs:
+                break
+    if len(job_ids) < jobs:
+        return list(LEDGER)
+
+    records = list(LEDGER)
+    first = next(i for i, record in enumerate(records) if record["job_id"] in job_ids)
+    return [r for r in records[first:] if r["job_id"] is None or r["job_id"] in job_ids]
+
+
+def summarize(records: list) -> dict:
+    """Return {stage: (count, p50, p95, p99)} over `records`, including the end-to-end total."""
+    samples = {"total": []}
+    for record in records:
+        samples["total"].append(record["total"])
+        for name, seconds in record["stages"].items():
+            samples.setdefault(name, []).append(seconds)
+
+    summary = {}
+    for name, values in samples.items():
+        if values:
+            values.sort()
+            summary[name] = (
+                len(values),
+                percentile(values, 50),
+                percentile(values, 95),
+                percentile(values, 99),
+            )
+    return summary
@@ -0,0 +1,75 @@
+from time import monotonic
+
+from helpers.ratelimit import api_call, pause_remaining
+from logger import LOGGER
+
+# How long a membership probe result is trusted before asking Telegram again.
+MEMBERSHIP_TTL = 600
+
+
+class ClientPool:
+    """Spreads work across several clients of the same kind.
+
+    Clients in FloodWait are avoided, chats are only routed to clients that
+    can read them, and ties go to the client with the fewest active items.
+    """
+
+    def __init__(self, clients: list):
+        self.clients = clients
+        self.active = {client.name: 0 for client in clients}
+        self.membership = {}  # (client name, chat id) -> (is_member, checked_at)
+        self._turn = 0
+
+    @property
+    def primary(self):
+        return self.clients[0]
+
+    async def is_member(self, client, chat_id) -> bool:
+        if len(self.clients) == 1:
+            return True
+
+        key = (client.name, chat_id)
+        cached = self.membership.get(key)
+        if cached and monotonic() - cached[1] < MEMBERSHIP_TTL:
+            return cached[0]
+
+        try:
+            await api_call(client, "read", client.get_chat, chat_id)
+            is_member = True
+        except Exception as e:
+            LOGGER(__name__).info(f"{client.name} cannot access {chat_id}: {e}")
+            is_member = False
+        self.membership[key] = (is_member, monotonic())
+        return is_member
+
+    async def pick(self, *chat_ids, preferred=None):
+        """Return the best client that can access all `chat_ids`, keeping `preferred` when it is healthy."""
+        candidates = []
+        for client in self.clients:
+            for chat_id in chat_ids:
+                if not await self.is_member(client, chat_id):
+                    break
+            else:
+                candidates.append(client)
+        if not candidates:
+            # Nobody can read it; let the caller's request fail with the usual error.
+            return preferred or self.primary
+
+        healthy = [client for client in candidates if pause_remaining(client) == 0]
+        if preferred in healthy:
+            return preferred
+        if not healthy:
+            return min(candidates, key=pause_remaining)
+
+        self._turn += 1
+        size = len(self.clients)
+        return min(
+            healthy,
+            key=lambda client: (self.active[client.name], (self.clients.index(client) - self._turn) % size),
+        )
+
+    def acquire(self, client) -> None:
+        self.active[client.name] += 1
+
+    def release(self, client) -> None:
+        self.active[client.name] -= 1
@@ -0,0 +1,353 @@
+# Reads duration, dimensions and tags straight from container headers:
+# MP4/MOV/M4A (moov box), Matroska/WebM (EBML Info and Tracks) and MP3 (ID3v2
+# plus the first frame's Xing/VBRI header or bitrate). Anything else returns
+# None so the caller falls back to ffprobe.
+import os
+import struct
+
+# Never read more than this much of a header into memory.
+MAX_HEADER_BYTES = 64 * 1024 * 1024
+# Matroska Info/Tracks and the first MP3 frame sit within the first few KiB.
+SCAN_BYTES = 1024 * 1024
+
+
+def read_header_info(path):
+    """Return (duration, artist, title, width, height) or None if the header can't be used."""
+    try:
+        with open(path, "rb") as f:
+            magic = f.read(12)
+            f.seek(0)
+            if magic[4:8] == b"ftyp" or magic[4:8] in (b"moov", b"mdat", b"wide", b"free"):
+                info = _read_mp4(f)
+            elif magic[:4] == b"\x1a\x45\xdf\xa3":
+                info = _read_matroska(f)
+            elif magic[:3] == b"ID3" or (len(magic) > 1 and magic[0] == 0xFF and magic[1] & 0xE0 == 0xE0):
+                info = _read_mp3(f, os.fstat(f.fileno()).st_size)
+            else:
+                return None
+    except (OSError, ValueError, struct.error, IndexError, UnicodeDecodeError):
+        return None
+
+    if not info or not info[0]:
+        return None
+    return info
+
+
+# -------------------------------------------------------------------------------------
+# MP4 / MOV / M4A
+# -------------------------------------------------------------------------------------
+def _iter_boxes(data, start=0, end=None):
+    end = len(data) if end is None else end
+    pos = start
+    while pos + 8 <= end:
+        size, kind = struct.unpack_from(">I4s", data, pos)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", data, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            return
+        yield kind, pos + header, pos + size
+        pos += size
+
+
+def _find_box(data, kind, start=0, end=None):
+    for box_kind, body, box_end in _iter_boxes(data, start, end):
+        if box_kind == kind:
+            return body, box_end
+    return None
+
+
+def _read_mp4(f):
+    # Walk the top-level boxes by seeking, so a large mdat before moov is never read.
+    moov = None
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            break
+        size, kind = struct.unpack(">I4s", header)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+            header_size = 16
+        elif size == 0:
+            size = os.fstat(f.fileno()).st_size - f.tell() + header_size
+        if size < header_size:
+            return None
+        if kind == b"moov":
+            if size > MAX_HEADER_BYTES:
+                return None
+            moov = f.read(size - header_size)
+            break
+        f.seek(size - header_size, os.SEEK_CUR)
+
+    if not moov:
+        return None
+
+    duration = 0
+    mvhd = _find_box(moov, b"mvhd")
+    if mvhd:
+        body = mvhd[0]
+        if moov[body] == 1:
+            timescale, length = struct.unpack_from(">IQ", moov, body + 20)
+        else:
+            timescale, length = struct.unpack_from(">II", moov, body + 12)
+        if timescale:
+            duration = length / timescale
+
+    width = height = None
+    for kind, body, end in _iter_boxes(moov):
+        if kind != b"trak":
+            continue
+        mdia = _find_box(moov, b"mdia", body, end)
+        hdlr = mdia and _find_box(moov, b"hdlr", *mdia)
+        if not hdlr or moov[hdlr[0] + 8:hdlr[0] + 12] != b"vide":
+            continue
+        tkhd = _find_box(moov, b"tkhd", body, end)
+        if tkhd:
+            # Width and height are the last two 16.16 fixed-point fields.
+            w, h = struct.unpack_from(">II", moov, tkhd[1] - 8)
+            width, height = w >> 16 or None, h >> 16 or None
+            break
+
+    artist, title = _read_ilst(moov)
+    return round(duration), artist, title, width, height
+
+
+def _read_ilst(moov):
+    udta = _find_box(moov, b"udta")
+    meta = udta and _find_box(moov, b"meta", *udta)
+    if not meta:
+        return None, None
+
+    body, end = meta
+    # ISO meta is a full box (4 bytes of version/flags); QuickTime's is not.
+    if moov[body + 4:body + 8] != b"hdlr":
+        body += 4
+    ilst = _find_box(moov, b"ilst", body, end)
+    if not ilst:
+        return None, None
+
+    tags = {}
+    for kind, item_body, item_end in _iter_boxes(moov, *ilst):
+        data = _find_box(moov, b"data", item_body, item_end)
+        if data:
+            # data box: 4 bytes type, 4 bytes locale, then the value.
+            tags[kind] = moov[data[0] + 8:data[1]].decode("utf-8", "replace").strip("\x00") or None
+    return tags.get(b"\xa9ART") or tags.get(b"aART"), tags.get(b"\xa9nam")
+
+
+# -------------------------------------------------------------------------------------
+# Matroska / WebM
+# -------------------------------------------------------------------------------------
+EBML_SEGMENT = 0x18538067
+EBML_INFO = 0x1549A966
+EBML_TRACKS = 0x1654AE6B
+EBML_CLUSTER = 0x1F43B675
+EBML_TIMECODE_SCALE = 0x2AD7B1
+EBML_DURATION = 0x4489
+EBML_TITLE = 0x7BA9
+EBML_TRACK_ENTRY = 0xAE
+EBML_TRACK_TYPE = 0x83
+EBML_VIDEO = 0xE0
+EBML_PIXEL_WIDTH = 0xB0
+EBML_PIXEL_HEIGHT = 0xBA
+
+
+def _read_vint(data, pos, keep_marker):
+    first = data[pos]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 8:
+        raise ValueError("Invalid EBML length")
+    value = first if keep_marker else first & (mask - 1)
+    for byte in data[pos + 1:pos + length]:
+        value = (value << 8) | byte
+    unknown = not keep_marker and value == (1 << (7 * length)) - 1
+    return value, pos + length, unknown
+
+
+def _iter_elements(data, start, end):
+    pos = start
+    while pos < end:
+        element_id, pos, _ = _read_vint(data, pos, keep_marker=True)
+        size, pos, unknown = _read_vint(data, pos, keep_marker=False)
+        body_end = end if unknown else min(pos + size, end)
+        yield element_id, pos, body_end, unknown
+        if unknown:
+            # Unknown-size masters (live streams) contain their children directly.
+            continue
+        pos = body_end
+
+
+def _uint(data, start, end):
+    return int.from_bytes(data[start:end], "big")
+
+
+def _read_matroska(f):
+    data = f.read(SCAN_BYTES)
+    scale = 1000000
+    duration = 0
+    title = None
+    width = height = None
+    seen_info = seen_tracks = False
+
+    for element_id, body, end, _ in _iter_elements(data, 0, len(data)):
+        if element_id == EBML_SEGMENT:
+            for child_id, child, child_end, unknown in _iter_elements(data, body, end):
+                if child_id == EBML_INFO:
+                    seen_info = True
+                    for field, value, value_end, _ in _iter_elements(data, child, child_end):
+                        if field == EBML_TIMECODE_SCALE:
+                            scale = _uint(data, value, value_end) or scale
+                        elif field == EBML_DURATION:
+                            fmt = ">f" if value_end - value == 4 else ">d"
+                            duration = struct.unpack_from(fmt, data, value)[0]
+                        elif field == EBML_TITLE:
+                            title = data[value:value_end].decode("utf-8", "replace") or None
+                elif child_id == EBML_TRACKS:
+                    seen_tracks = True
+                    width, height = _read_matroska_video(data, child, child_end)
+                elif child_id == EBML_CLUSTER:
+                    break
+                if seen_info and seen_tracks:
+                    break
+            break
+
+    if not seen_info:
+        return None
+    return round(duration * scale / 1e9), None, title, width, height
+
+
+def _read_matroska_video(data, start, end):
+    for entry_id, entry, entry_end, _ in _iter_elements(data, start, end):
+        if entry_id != EBML_TRACK_ENTRY:
+            continue
+        track_type = None
+        width = height = None
+        for field, value, value_end, _ in _iter_elements(data, entry, entry_end):
+            if field == EBML_TRACK_TYPE:
+                track_type = _uint(data, value, value_end)
+            elif field == EBML_VIDEO:
+                for video_field, v, v_end, _ in _iter_elements(data, value, value_end):
+                    if video_field == EBML_PIXEL_WIDTH:
+                        width = _uint(data, v, v_end)
+                    elif video_field == EBML_PIXEL_HEIGHT:
+                        height = _uint(data, v, v_end)
+        if track_type == 1:
+            return width, height
+    return None, None
+
+
+# -------------------------------------------------------------------------------------
+# MP3
+# -------------------------------------------------------------------------------------
+MP3_BITRATES = {
+    # (MPEG-1, layer) and (MPEG-2/2.5, layer) bitrate tables in kbit/s
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def _syncsafe(data):
+    return (data[0] << 21) | (data[1] << 14) | (data[2] << 7) | data[3]
+
+
+def _decode_id3_text(raw):
+    if not raw:
+        return None
+    encoding, text = raw[0], raw[1:]
+    if encoding == 0:
+        value = text.decode("latin-1")
+    elif encoding == 1:
+        value = text.decode("utf-16")
+    elif encoding == 2:
+        value = text.decode("utf-16-be")
+    else:
+        value = text.decode("utf-8")
+    return value.split("\x00")[0].strip() or None
+
+
+def _read_id3(f):
+    header = f.read(10)
+    if header[:3] != b"ID3":
+        return 0, {}
+    version, flags = header[3], header[5]
+    tag_size = _syncsafe(header[6:10])
+    tag_end = 10 + tag_size + (10 if flags & 0x10 else 0)
+    tag = f.read(min(tag_size, SCAN_BYTES))
+
+    frames = {}
+    pos = 0
+    if version == 2:
+        while pos + 6 <= len(tag) and tag[pos] != 0:
+            frame_id = tag[pos:pos + 3].decode("latin-1")
+            size = int.from_bytes(tag[pos + 3:pos + 6], "big")
+            frames[frame_id] = tag[pos + 6:pos + 6 + size]
+            pos += 6 + size
+        aliases = {"TT2": "TIT2", "TP1": "TPE1", "TLE": "TLEN"}
+        frames = {aliases.get(k, k): v for k, v in frames.items()}
+    else:
+        while pos + 10 <= len(tag) and tag[pos] != 0:
+            frame_id = tag[pos:pos + 4].decode("latin-1")
+            raw_size = tag[pos + 4:pos + 8]
+            size = _syncsafe(raw_size) if version == 4 else int.from_bytes(raw_size, "big")
+            frames[frame_id] = tag[pos + 10:pos + 10 + size]
+            pos += 10 + size
+    return tag_end, frames
+
+
+def _read_mp3(f, file_size):
+    audio_start, frames = _read_id3(f)
+    title = _decode_id3_text(frames.get("TIT2"))
+    artist = _decode_id3_text(frames.get("TPE1"))
+
+    length = _decode_id3_text(frames.get("TLEN"))
+    if length and length.isdigit() and int(length) > 0:
+        return round(int(length) / 1000), artist, title, None, None
+
+    f.seek(audio_start)
+    data = f.read(64 * 1024)
+    for pos in range(len(data) - 4):
+        if data[pos] != 0xFF or data[pos + 1] & 0xE0 != 0xE0:
+            continue
+        header = int.from_bytes(data[pos:pos + 4], "big")
+        version_bits = (header >> 19) & 3
+        layer_bits = (header >> 17) & 3
+        bitrate_index = (header >> 12) & 0xF
+        rate_index = (header >> 10) & 3
+        if version_bits == 1 or layer_bits == 0 or bitrate_index in (0, 15) or rate_index == 3:
+            continue
+
+        mpeg1 = version_bits == 3
+        layer = 4 - layer_bits
+        bitrate = MP3_BITRATES[(1 if mpeg1 else 2, layer)][bitrate_index] * 1000
+        sample_rate = MP3_SAMPLE_RATES[version_bits][rate_index]
+        samples = 384 if layer == 1 else 1152 if (layer == 2 or mpeg1) else 576
+
+        # A Xing/Info or VBRI header carries the exact frame count of VBR files.
+        mono = (header >> 6) & 3 == 3
+        side_info = (17 if mono else 32) if mpeg1 else (9 if mono else 17)
+        xing = pos + 4 + side_info
+        if data[xing:xing + 4] in (b"Xing", b"Info") and struct.unpack_from(">I", data, xing + 4)[0] & 1:
+            frame_count = struct.unpack_from(">I", data, xing + 8)[0]
+            return round(frame_count * samples / sample_rate), artist, title, None, None
+        vbri = pos + 36
+        if data[vbri:vbri + 4] == b"VBRI":
+            frame_count = struct.unpack_from(">I", data, vbri + 14)[0]
+            return round(frame_count * samples / sample_rate), artist, title, None, None
+
+        audio_bytes = file_size - audio_start - pos
+        return round(audio_bytes * 8 / bitrate), artist, title, None, None
+
+    return None
@@ -0,0 +1,156 @@
+import asyncio
+from time import monotonic
+
+from pyrogram.errors import FloodWait
+
+from config import PyroConf
+from helpers import perf
+from helpers.jobs import INTERACTIVE, current_lane
+from helpers.metrics import FLOOD_WAITS, FLOOD_WAIT_SECONDS
+from logger import LOGGER
+
+# Method classes with their base budget in calls per second, per client.
+RATE_CLASSES = {
+    "read": PyroConf.RATE_LIMIT_READ,
+    "copy": PyroConf.RATE_LIMIT_COPY,
+    "download": PyroConf.RATE_LIMIT_DOWNLOAD,
+    "upload": PyroConf.RATE_LIMIT_UPLOAD,
+    "edit": PyroConf.RATE_LIMIT_EDIT,
+}
+
+# After a FloodWait a bucket runs at half speed (never below this share of its base
+# rate) and recovers by 25% for every RECOVERY_INTERVAL seconds without a new one.
+MIN_RATE_FACTOR = 0.1
+RECOVERY_INTERVAL = 60
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.base_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = monotonic()
+        self.blocked_until = 0.0
+        self.last_penalty = 0.0
+        self.lock = asyncio.Lock()
+        self.priority_waiters = 0
+
+    def _refill(self, now: float) -> None:
+        if self.rate < self.base_rate and now - self.last_penalty >= RECOVERY_INTERVAL:
+            self.rate = min(self.base_rate, self.rate * 1.25)
+            self.last_penalty = now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self) -> bool:
+        now = monotonic()
+        if now < self.blocked_until:
+            return False
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    async def acquire(self, priority: bool = False) -> None:
+        if priority:
+            # Interactive calls skip the queue; queued calls hold back while one is waiting.
+            self.priority_waiters += 1
+            try:
+                await self._take(priority=True)
+            finally:
+                self.priority_waiters -= 1
+            return
+        # The lock keeps waiters in FIFO order so nobody starves behind a burst.
+        async with self.lock:
+            await self._take()
+
+    async def _take(self, priority: bool = False) -> None:
+        while True:
+            now = monotonic()
+            if now < self.blocked_until:
+                await asyncio.sleep(self.blocked_until - now)
+                continue
+            self._refill(now)
+            if self.tokens >= 1 and (priority or not self.priority_waiters):
+                self.tokens -= 1
+                return
+            await asyncio.sleep(max(1 - self.tokens, 0.1) / self.rate)
+
+    def penalize(self, wait_seconds: float) -> None:
+        now = monotonic()
+        self.rate = max(self.rate * 0.5, self.base_rate * MIN_RATE_FACTOR)
+        self.tokens = 0
+        self.blocked_until = max(self.blocked_until, now + wait_seconds)
+        self.last_penalty = now
+
+
+# (client name, method class) -> TokenBucket
+_buckets = {}
+# client name -> monotonic time until which every call on that client waits
+_paused_until = {}
+
+
+def get_bucket(client, kind: str) -> TokenBucket:
+    key = (client.name, kind)
+    bucket = _buckets.get(key)
+    if bucket is None:
+        bucket = TokenBucket(RATE_CLASSES[kind], PyroConf.RATE_LIMIT_BURST)
+        _buckets[key] = bucket
+    return bucket
+
+
+def can_call(client, kind: str) -> bool:
+    """Non-blocking variant for optional calls such as progress edits."""
+    if pause_remaining(client) > 0:
+        return False
+    return get_bucket(client, kind).try_acquire()
+
+
+def pause_client(client, seconds: float) -> None:
+    FLOOD_WAITS.labels(client=client.name).inc()
+    FLOOD_WAIT_SECONDS.labels(client=client.name).inc(seconds)
+    until = monotonic() + seconds
+    if until > _paused_until.get(client.name, 0):
+        _paused_until[client.name] = until
+        LOGGER(__name__).warning(f"Pausing all calls on {client.name} for {seconds}s")
+
+
+def pause_remaining(client) -> float:
+    return max(0.0, _paused_until.get(client.name, 0) - monotonic())
+
+
+async def wait_if_paused(client) -> None:
+    remaining = pause_remaining(client)
+    while remaining > 0:
+        await asyncio.sleep(remaining)
+        remaining = pause_remaining(client)
+
+
+def penalize(client, kind: str, wait_seconds: float) -> None:
+    bucket = get_bucket(client, kind)
+    bucket.penalize(wait_seconds)
+    LOGGER(__name__).warning(
+        f"FloodWait {wait_seconds}s on {client.name}/{kind}; rate lowered to {bucket.rate:.2f}/s"
+    )
+
+
+async def api_call(client, kind: str, func, *args, **kwargs):
+    """Run a Telegram API call through the client's budget for the given method class.
+
+    A FloodWait pauses every call on that client for the requested time and
+    tightens the bucket before being re-raised to the caller.
+    """
+    started = monotonic()
+    await wait_if_paused(client)
+    await get_bucket(client, kind).acquire(priority=current_lane.get() == INTERACTIVE)
+    waited = monotonic() - started
+    if waited > 0.001:
+        perf.add("sleep", waited)
+    try:
+        return await func(*args, **kwargs)
+    except FloodWait as e:
+        pause_client(client, e.value)
+        penalize(client, kind, e.value)
+        raise
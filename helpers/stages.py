@@ -0,0 +1,60 @@
+from time import monotonic
+
+from helpers import perf
+from helpers.jobs import FairSemaphore, current_lane, current_user
+from helpers.metrics import STAGE_SECONDS, STAGE_WAIT_SECONDS
+
+
+class Stage:
+    """One step of the download pipeline with its own concurrency limit.
+
+    Slots are shared fairly between users: waiters queue per user and are
+    served round-robin, interactive items ahead of batch items. `reserved`
+    extra slots can only be taken by interactive items.
+    """
+
+    def __init__(self, name: str, limit: int, reserved: int = 0):
+        self.name = name
+        self.limit = limit
+        self.reserved = reserved
+        self.active = 0
+        self.waiting = 0
+        self.semaphore = FairSemaphore(limit, reserved)
+
+    def slot(self) -> "StageSlot":
+        return StageSlot(self)
+
+
+class StageSlot:
+    """A slot in a stage, held until the `async with` block ends or `release()` is called."""
+
+    def __init__(self, stage: Stage):
+        self.stage = stage
+        self.held = False
+        self.acquired_at = 0.0
+
+    async def __aenter__(self):
+        queued_at = monotonic()
+        lane = current_lane.get()
+        self.stage.waiting += 1
+        try:
+            await self.stage.semaphore.acquire(current_user.get(), lane)
+        finally:
+            self.stage.waiting -= 1
+        self.held = True
+        self.acquired_at = monotonic()
+        self.stage.active += 1
+        STAGE_WAIT_SECONDS.labels(stage=self.stage.name, lane=lane).observe(self.acquired_at - queued_at)
+        perf.add("queue", self.acquired_at - queued_at)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.release()
+
+    def release(self) -> None:
+        # Safe to call more than once; only the first call frees the slot.
+        if self.held:
+            self.held = False
+            self.stage.active -= 1
+            self.stage.semaphore.release()
+            STAGE_SECONDS.labels(stage=self.stage.name).observe(monotonic() - self.acquired_at)
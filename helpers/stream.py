@@ -0,0 +1,248 @@
+import asyncio
+import math
+import os
+
+from pyrogram import raw, types, utils
+from pyrogram.session import Session
+
+from config import PyroConf
+from helpers.metadata import download_source_thumb
+from helpers.msg import get_file_name
+from helpers.ratelimit import api_call
+from logger import LOGGER
+
+# Telegram upload parts are 512 KiB; stream_media yields 1 MiB chunks.
+UPLOAD_PART_SIZE = 512 * 1024
+# Files up to this size must be uploaded with an md5 checksum, so they go through disk.
+BIG_FILE_THRESHOLD = 10 * 1024 * 1024
+UPLOAD_WORKERS = 4
+
+
+def get_stream_media(chat_message, media_type: str):
+    """Return the source media object if this post can be piped without touching disk."""
+    if media_type not in ("document", "video", "audio"):
+        return None
+
+    media = getattr(chat_message, media_type, None)
+    if not media or (media.file_size or 0) <= BIG_FILE_THRESHOLD:
+        return None
+
+    # Without Telegram-side metadata we need ffprobe on the full file.
+    if media_type == "video" and not (media.duration and media.width and media.height):
+        return None
+    if media_type == "audio" and not media.duration:
+        return None
+
+    return media
+
+
+def build_attributes(media_type: str, media, file_name: str) -> list:
+    attributes = [raw.types.DocumentAttributeFilename(file_name=file_name)]
+    if media_type == "video":
+        attributes.append(
+            raw.types.DocumentAttributeVideo(
+                duration=media.duration,
+                w=media.width,
+                h=media.height,
+                supports_streaming=True,
+            )
+        )
+    elif media_type == "audio":
+        attributes.append(
+            raw.types.DocumentAttributeAudio(
+                duration=media.duration,
+                performer=media.performer,
+                title=media.title,
+            )
+        )
+    return attributes
+
+
+async def stream_upload(
+    session,
+    uploader,
+    chat_message,
+    media_type: str,
+    target_chat_id,
+    caption: str,
+    progress=None,
+    progress_args: tuple = ()
+):
+    """Pipe a post's media from `session` into an upload by `uploader`.
+
+    Downloaded chunks pass through a bounded in-memory queue, so the upload
+    starts with the first chunk and no file is written to disk. The download
+    and the upload each run under their own client's rate limits, so a
+    FloodWait pauses the client that received it.
+    """
+    media = get_stream_media(chat_message, media_type)
+    if media is None:
+        raise ValueError("Media can't be streamed")
+
+    file_size = media.file_size
+    file_name = get_file_name(chat_message.id, chat_message)
+    file_id = uploader.rnd_id()
+    total_parts = math.ceil(file_size / UPLOAD_PART_SIZE)
+    queue = asyncio.Queue(maxsize=PyroConf.STREAM_BUFFER_PARTS)
+    uploaded = 0
+
+    async def produce():
+        part = 0
+        async for chunk in session.stream_media(chat_message):
+            for start in range(0, len(chunk), UPLOAD_PART_SIZE):
+                await queue.put((part, chunk[start:start + UPLOAD_PART_SIZE]))
+                part += 1
+        for _ in range(UPLOAD_WORKERS):
+            await queue.put(None)
+        if part != total_parts:
+            raise ValueError(f"Streamed {part} parts, expected {total_parts}")
+
+    async def upload_parts(media_session):
+        nonlocal uploaded
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            part, data = item
+            await media_session.invoke(
+                raw.functions.upload.SaveBigFilePart(
+                    file_id=file_id,
+                    file_part=part,
+                    file_total_parts=total_parts,
+                    bytes=data,
+                ),
+                sleep_threshold=uploader.sleep_threshold,
+            )
+            uploaded += len(data)
+            if progress:
+                await progress(min(uploaded, file_size), file_size, *progress_args)
+
+    async def upload():
+        # Like save_file, send the parts over a dedicated media connection so a
+        # long stream does not hold up the bot's messages and callbacks.
+        async with uploader.save_file_semaphore:
+            media_session = Session(
+                uploader, await uploader.storage.dc_id(), await uploader.storage.auth_key(),
+                await uploader.storage.test_mode(), is_media=True
+            )
+            await media_session.start()
+            workers = [asyncio.create_task(upload_parts(media_session)) for _ in range(UPLOAD_WORKERS)]
+            try:
+                await asyncio.gather(*workers)
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await media_session.stop()
+
+    tasks = [
+        asyncio.create_task(api_call(session, "download", produce)),
+        asyncio.create_task(api_call(uploader, "upload", upload)),
+    ]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+    # Reuse the source thumbnail; it is small enough to keep in memory.
+    thumb = None
+    source_thumb = await download_source_thumb(chat_message, media_type)
+    if source_thumb:
+        try:
+            thumb = await api_call(uploader, "upload", uploader.save_file, source_thumb)
+        except Exception as e:
+            LOGGER(__name__).info(f"Could not upload thumbnail for {file_name}: {e}")
+
+    input_media = raw.types.InputMediaUploadedDocument(
+        mime_type=getattr(media, "mime_type", None) or uploader.guess_mime_type(file_name) or "application/octet-stream",
+        file=raw.types.InputFileBig(id=file_id, parts=total_parts, name=file_name),
+        thumb=thumb,
+        attributes=build_attributes(media_type, media, file_name),
+        force_file=True if media_type == "document" else None,
+    )
+
+    r = await api_call(
+        uploader, "upload", uploader.invoke,
+        raw.functions.messages.SendMedia(
+            peer=await uploader.resolve_peer(target_chat_id),
+            media=input_media,
+            random_id=uploader.rnd_id(),
+            **await utils.parse_text_entities(uploader, caption or "", None, None)
+        )
+    )
+
+    for update in r.updates:
+        if isinstance(update, (raw.types.UpdateNewMessage, raw.types.UpdateNewChannelMessage)):
+            return await types.Message._parse(
+                uploader, update.message,
+                {user.id: user for user in r.users},
+                {chat.id: chat for chat in r.chats},
+            )
+
+    LOGGER(__name__).warning(f"Streamed upload of {file_name} returned no message")
+    return None
+
+
+# stream_media offsets and limits are counted in 1 MiB chunks.
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def get_media_size(chat_message) -> int:
+    for kind in ("document", "video", "audio", "animation", "voice", "video_note", "photo"):
+        media = getattr(chat_message, kind, None)
+        if media is not None:
+            return getattr(media, "file_size", 0) or 0
+    return 0
+
+
+async def download_parallel(session, chat_message, file_path: str, parts: int, progress=None, progress_args: tuple = ()):
+    """Download one file as `parts` byte ranges at once into a preallocated file.
+
+    Every stream_media call opens its own media-DC connection, so the ranges
+    are fetched over separate connections and written at their own offsets.
+    """
+    file_size = get_media_size(chat_message)
+    total_chunks = math.ceil(file_size / DOWNLOAD_CHUNK_SIZE)
+    parts = max(1, min(parts, total_chunks))
+    per_part = math.ceil(total_chunks / parts)
+    downloaded = 0
+
+    # The folder may have been removed by another item's cleanup since the path was made.
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+    with open(file_path, "wb") as f:
+        f.truncate(file_size)
+
+    fd = os.open(file_path, os.O_WRONLY)
+
+    async def fetch_range(first_chunk: int, chunk_count: int):
+        nonlocal downloaded
+        position = first_chunk * DOWNLOAD_CHUNK_SIZE
+        async for chunk in session.stream_media(chat_message, limit=chunk_count, offset=first_chunk):
+            os.pwrite(fd, chunk, position)
+            position += len(chunk)
+            downloaded += len(chunk)
+            if progress:
+                await progress(min(downloaded, file_size), file_size, *progress_args)
+
+    tasks = [
+        asyncio.create_task(fetch_range(first, min(per_part, total_chunks - first)))
+        for first in range(0, total_chunks, per_part)
+    ]
+    complete = False
+    try:
+        await asyncio.gather(*tasks)
+        if downloaded != file_size:
+            raise ValueError(f"Downloaded {downloaded} of {file_size} bytes")
+        complete = True
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    finally:
+        os.close(fd)
+        if not complete:
+            # Like Pyrogram's own download, leave no partial file behind.
+            os.remove(file_path)
+
+    return file_path
@@ -3,8 +3,6 @@ import asyncio
 import time
 import math
 from typing import Optional
-from asyncio.subprocess import PIPE
-from asyncio import create_subprocess_exec, create_subprocess_shell, wait_for
 
 from pyrogram.parser import Parser
 from pyrogram.utils import get_channel_id
@@ -17,7 +15,7 @@ from pyrogram.types import (
     InputMediaAudio,
     Voice,
 )
-from pyrogram.errors import MessageNotModified
+from pyrogram.errors import MessageNotModified, FloodWait
 
 from helpers.files import (
     fileSizeLimit,
@@ -26,7 +24,12 @@ from helpers.files import (
     get_readable_time
 )
 
+from helpers import perf
+from helpers.metrics import BYTES
+from helpers.metadata import get_media_info, get_video_thumbnail, download_source_thumb
 from helpers.msg import get_parsed_msg
+from helpers.ratelimit import TokenBucket, api_call, can_call, pause_client, penalize
+from config import PyroConf
 from logger import LOGGER
 
 
@@ -38,10 +41,39 @@ Elapsed Time: {elapsed_time}
 Estimated Time Left: {est_time}
 """
 
-# Cache to limit progress updates
-PROGRESS_CACHE = {}
+# Seconds between ticker passes, and how long a progress without new data is kept.
+PROGRESS_TICK = 1
+PROGRESS_IDLE_TIMEOUT = 120
+
+
+class ProgressState:
+    """Live numbers of one progress message; the transfer callback only writes counters."""
+
+    __slots__ = (
+        "message", "action", "start_time", "current", "total", "updated",
+        "last_time", "last_current", "last_edit", "last_refresh", "rendered",
+    )
+
+    def __init__(self, message, action: str, start_time: float):
+        now = time.time()
+        self.message = message
+        self.action = action
+        self.start_time = start_time
+        self.current = 0
+        self.total = 0
+        self.updated = now
+        self.last_time = now
+        self.last_current = 0
+        self.last_edit = 0.0
+        self.last_refresh = 0.0
+        self.rendered = -1
+
+
+# (chat id, message id) -> ProgressState, rendered by a single ticker task
 PROGRESS_STATE = {}
-PROGRESS_REFRESH_COOLDOWN = {}
+PROGRESS_TICKER = None
+# Shared by every progress message, across all bots.
+PROGRESS_EDIT_BUDGET = TokenBucket(PyroConf.PROGRESS_EDIT_RATE, PyroConf.RATE_LIMIT_BURST)
 
 
 def progress_keyboard():
@@ -81,168 +113,76 @@ def build_progress_text(
     return f"**{action}**\n{bar}\n{text}"
 
 
-async def cmd_exec(cmd, shell=False):
-    if shell:
-        proc = await create_subprocess_shell(cmd, stdout=PIPE, stderr=PIPE)
-    else:
-        proc = await create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
-
-    stdout, stderr = await proc.communicate()
-
-    try:
-        stdout = stdout.decode().strip()
-    except Exception:
-        stdout = "Unable to decode the response!"
-
-    try:
-        stderr = stderr.decode().strip()
-    except Exception:
-        stderr = "Unable to decode the error!"
-
-    return stdout, stderr, proc.returncode
-
-
-async def get_media_info(path):
-    try:
-        result = await cmd_exec([
-            "ffprobe", "-hide_banner", "-loglevel", "error",
-            "-print_format", "json", "-show_format", "-show_streams", path,
-        ])
-    except Exception as e:
-        LOGGER(__name__).error(f"Get Media Info: {e}. File: {path}")
-        return 0, None, None, None, None
-
-    if result[0] and result[2] == 0:
-        try:
-            import json
-            data = json.loads(result[0])
-
-            fields = data.get("format", {})
-            duration = round(float(fields.get("duration", 0)))
-
-            tags = fields.get("tags", {})
-            artist = tags.get("artist") or tags.get("ARTIST") or tags.get("Artist")
-            title = tags.get("title") or tags.get("TITLE") or tags.get("Title")
-
-            width = None
-            height = None
-            for stream in data.get("streams", []):
-                if stream.get("codec_type") == "video":
-                    width = stream.get("width")
-                    height = stream.get("height")
-                    break
-
-            return duration, artist, title, width, height
-        except Exception as e:
-            LOGGER(__name__).error(f"Error parsing media info: {e}")
-            return 0, None, None, None, None
-
-    return 0, None, None, None, None
-
-
-async def get_video_thumbnail(video_file, duration):
-    os.makedirs("Assets", exist_ok=True)
-    output = os.path.join("Assets", "video_thumb.jpg")
+def progressArgs(action: str, progress_message, start_time):
+    """Register `progress_message` with the ticker and return the callback's progress_args."""
+    key = (progress_message.chat.id, progress_message.id)
+    state = PROGRESS_STATE.get(key)
+    if state is None:
+        state = ProgressState(progress_message, action, start_time)
+        PROGRESS_STATE[key] = state
+    elif state.action != action:
+        # Same message, next phase (e.g. download -> upload): restart the speed sample.
+        state.action = action
+        state.start_time = start_time
+        state.last_time = time.time()
+        state.last_current = 0
+        state.rendered = -1
+    ensure_progress_ticker()
+    return (state,)
 
-    if duration is None:
-        duration = (await get_media_info(video_file))[0]
 
-    if not duration:
-        duration = 3
+async def progress_for_pyrogram(current, total, state):
+    # Runs for every chunk: only record the numbers, the ticker does the rest.
+    state.current = current
+    state.total = total
+    state.updated = time.time()
 
-    duration //= 2
 
-    if os.path.exists(output):
-        try:
-            os.remove(output)
-        except Exception:
-            pass
+class TransferCounter:
+    """Sums the bytes of many transfers, for batch-wide throughput."""
 
-    cmd = [
-        "ffmpeg", "-hide_banner", "-loglevel", "error",
-        "-ss", str(duration), "-i", video_file,
-        "-vframes", "1", "-q:v", "2",
-        "-y", output,
-    ]
+    __slots__ = ("bytes",)
 
-    try:
-        _, err, code = await wait_for(cmd_exec(cmd), timeout=60)
-        if code != 0 or not os.path.exists(output):
-            LOGGER(__name__).warning(f"Thumbnail generation failed: {err}")
-            return None
-    except Exception as e:
-        LOGGER(__name__).warning(f"Thumbnail generation error: {e}")
-        return None
+    def __init__(self):
+        self.bytes = 0
 
-    return output
+    def track(self) -> tuple:
+        # Each transfer reports its own running total, so it needs its own sample.
+        return (TransferSample(self),)
 
 
-def progressArgs(action: str, progress_message, start_time):
-    return (action, progress_message, start_time, PROGRESS_BAR, "▓", "░")
+class TransferSample:
+    __slots__ = ("counter", "last")
 
+    def __init__(self, counter: TransferCounter):
+        self.counter = counter
+        self.last = 0
 
-async def progress_for_pyrogram(
-    current,
-    total,
-    action,
-    message,
-    start_time,
-    template,
-    finish,
-    unfinish
-):
-    now = time.time()
 
-    is_download = "Download" in action
-    size_mb = total / (1024 * 1024)
-    if is_download:
-        interval = 25 if size_mb < 500 else 20
-    else:
-        interval = 5 if size_mb < 500 else 10
-
-    state = PROGRESS_STATE.get(message.id)
-    if not state:
-        state = {
-            "start_time": start_time,
-            "last_time": now,
-            "last_current": current,
-            "template": template,
-            "finish": finish,
-            "unfinish": unfinish,
-        }
-    PROGRESS_STATE[message.id] = {
-        "current": current,
-        "total": total,
-        "action": action,
-        "start_time": state["start_time"],
-        "last_time": state["last_time"],
-        "last_current": state["last_current"],
-        "template": template,
-        "finish": finish,
-        "unfinish": unfinish,
-    }
+async def count_transfer(current, total, sample):
+    if current < sample.last:
+        # The transfer restarted (e.g. a retry), count it from zero again.
+        sample.last = 0
+    sample.counter.bytes += current - sample.last
+    sample.last = current
 
-    last_update = PROGRESS_CACHE.get(message.id, 0)
-    if current != total and (now - last_update) < interval:
-        return
 
-    PROGRESS_CACHE[message.id] = now
-
-    elapsed_time = now - PROGRESS_STATE[message.id]["start_time"]
+def render_progress(state, now):
+    elapsed_time = now - state.start_time
     if elapsed_time <= 0:
         elapsed_time = 0.1
 
-    delta_time = now - PROGRESS_STATE[message.id]["last_time"]
+    delta_time = now - state.last_time
     if delta_time <= 0:
         delta_time = 0.1
-    delta_bytes = current - PROGRESS_STATE[message.id]["last_current"]
+    delta_bytes = state.current - state.last_current
     if delta_bytes < 0:
         delta_bytes = 0
 
-    speed_value = delta_bytes / delta_time if delta_bytes else (current / elapsed_time)
+    speed_value = delta_bytes / delta_time if delta_bytes else (state.current / elapsed_time)
     speed_text = f"{get_readable_file_size(speed_value)}/s"
 
-    remaining_bytes = total - current
+    remaining_bytes = state.total - state.current
     if speed_value > 0:
         etl_seconds = remaining_bytes / speed_value
         etl_text = get_readable_time(int(etl_seconds))
@@ -250,85 +190,98 @@ async def progress_for_pyrogram(
         etl_text = "0s"
     elapsed_text = get_readable_time(int(elapsed_time))
 
-    text = build_progress_text(
-        current=current,
-        total=total,
-        action=action,
-        template=template,
-        finish=finish,
-        unfinish=unfinish,
+    state.last_time = now
+    state.last_current = state.current
+    state.rendered = state.current
+
+    return build_progress_text(
+        current=state.current,
+        total=state.total,
+        action=state.action,
+        template=PROGRESS_BAR,
+        finish="▓",
+        unfinish="░",
         speed_text=speed_text,
         elapsed_text=elapsed_text,
         etl_text=etl_text
     )
 
+
+def progress_interval(state) -> int:
+    size_mb = state.total / (1024 * 1024)
+    if "Download" in state.action:
+        return 25 if size_mb < 500 else 20
+    return 5 if size_mb < 500 else 10
+
+
+async def edit_progress(key, state, now):
+    message = state.message
+    text = render_progress(state, now)
+    state.last_edit = now
     try:
         await message.edit(text, reply_markup=progress_keyboard())
     except MessageNotModified:
         pass
+    except FloodWait as e:
+        pause_client(message._client, e.value)
+        penalize(message._client, "edit", e.value)
     except Exception as e:
-        LOGGER(__name__).error(f"Progress Error: {e}")
-
-    if current == total:
-        PROGRESS_CACHE.pop(message.id, None)
-        PROGRESS_STATE.pop(message.id, None)
-        PROGRESS_REFRESH_COOLDOWN.pop(message.id, None)
-    else:
-        PROGRESS_STATE[message.id]["last_time"] = now
-        PROGRESS_STATE[message.id]["last_current"] = current
+        # Usually the progress message was deleted when its transfer finished.
+        LOGGER(__name__).info(f"Dropping progress for {key}: {e}")
+        PROGRESS_STATE.pop(key, None)
+
+
+def ensure_progress_ticker():
+    global PROGRESS_TICKER
+    if PROGRESS_TICKER is None or PROGRESS_TICKER.done():
+        PROGRESS_TICKER = asyncio.get_running_loop().create_task(progress_ticker())
+
+
+async def progress_ticker():
+    """Edit every active progress message from one task, within PROGRESS_EDIT_RATE."""
+    while PROGRESS_STATE:
+        await asyncio.sleep(PROGRESS_TICK)
+        now = time.time()
+
+        due = []
+        for key, state in list(PROGRESS_STATE.items()):
+            if now - state.updated > PROGRESS_IDLE_TIMEOUT:
+                PROGRESS_STATE.pop(key, None)
+            elif (
+                state.total
+                and state.current != state.rendered
+                and now - state.last_edit >= progress_interval(state)
+            ):
+                due.append((key, state))
+
+        # Longest-waiting messages go first when the budget is short.
+        due.sort(key=lambda item: item[1].last_edit)
+        edits = []
+        for key, state in due:
+            if not PROGRESS_EDIT_BUDGET.try_acquire():
+                break
+            # Progress edits are optional: skip this one rather than stall other calls.
+            if can_call(state.message._client, "edit"):
+                edits.append(edit_progress(key, state, now))
+        if edits:
+            await asyncio.gather(*edits)
 
 
 async def refresh_progress_message(message):
-    state = PROGRESS_STATE.get(message.id)
-    if not state:
+    state = PROGRESS_STATE.get((message.chat.id, message.id))
+    if not state or not state.total:
         return False, 0
 
     now = time.time()
-    last_refresh = PROGRESS_REFRESH_COOLDOWN.get(message.id, 0)
-    if (now - last_refresh) < 4:
-        remaining = int(math.ceil(4 - (now - last_refresh)))
+    if (now - state.last_refresh) < 4:
+        remaining = int(math.ceil(4 - (now - state.last_refresh)))
         return False, remaining
 
-    PROGRESS_REFRESH_COOLDOWN[message.id] = now
-    PROGRESS_CACHE[message.id] = 0
-    state["last_time"] = now
-    state["last_current"] = state["current"]
-
-    elapsed_time = now - state["start_time"]
-    if elapsed_time <= 0:
-        elapsed_time = 0.1
-
-    delta_time = now - state.get("last_time", now)
-    if delta_time <= 0:
-        delta_time = 0.1
-    delta_bytes = state["current"] - state.get("last_current", state["current"])
-    if delta_bytes < 0:
-        delta_bytes = 0
-
-    speed_value = delta_bytes / delta_time if delta_bytes else (state["current"] / elapsed_time)
-    speed_text = f"{get_readable_file_size(speed_value)}/s"
-
-    remaining_bytes = state["total"] - state["current"]
-    if speed_value > 0:
-        etl_seconds = remaining_bytes / speed_value
-        etl_text = get_readable_time(int(etl_seconds))
-    else:
-        etl_text = "0s"
-    elapsed_text = get_readable_time(int(elapsed_time))
-
-    text = build_progress_text(
-        current=state["current"],
-        total=state["total"],
-        action=state["action"],
-        template=state["template"],
-        finish=state["finish"],
-        unfinish=state["unfinish"],
-        speed_text=speed_text,
-        elapsed_text=elapsed_text,
-        etl_text=etl_text
-    )
+    state.last_refresh = now
+    state.last_edit = now
+    text = render_progress(state, now)
     try:
-        await message.edit(text, reply_markup=progress_keyboard())
+        await api_call(message._client, "edit", message.edit, text, reply_markup=progress_keyboard())
     except MessageNotModified:
         return True, 0
     except Exception as e:
@@ -338,6 +291,43 @@ async def refresh_progress_message(message):
     return True, 0
 
 
+async def prepare_media(media_path, media_type, source_message=None):
+    """Return the extra send arguments for a downloaded file.
+
+    Duration, size, tags and thumbnail come from the source post when Telegram
+    has them; ffprobe and ffmpeg only fill in what is missing.
+    """
+    source = getattr(source_message, media_type, None) if source_message else None
+
+    if media_type == "video":
+        if source and source.duration and source.width and source.height:
+            duration, width, height = source.duration, source.width, source.height
+        else:
+            with perf.stage("probe"):
+                duration, _, _, width, height = await get_media_info(media_path)
+        with perf.stage("thumbnail"):
+            thumb = None
+            if source:
+                thumb = await download_source_thumb(source_message, media_type, next_to=media_path)
+            if not thumb:
+                thumb = await get_video_thumbnail(media_path, duration)
+        return {"duration": duration, "width": width or 640, "height": height or 480, "thumb": thumb}
+
+    if media_type == "audio":
+        if source and source.duration:
+            duration, artist, title = source.duration, source.performer, source.title
+        else:
+            with perf.stage("probe"):
+                duration, artist, title, _, _ = await get_media_info(media_path)
+        info = {"duration": duration, "performer": artist, "title": title}
+        if source:
+            with perf.stage("thumbnail"):
+                info["thumb"] = await download_source_thumb(source_message, media_type, next_to=media_path)
+        return info
+
+    return {}
+
+
 async def send_media(
     bot,
     message,
@@ -346,7 +336,8 @@ async def send_media(
     caption,
     progress_message,
     start_time,
-    destination_chat_id=None
+    destination_chat_id=None,
+    media_info=None
 ):
     file_size = os.path.getsize(media_path)
     target_chat_id = destination_chat_id or message.chat.id
@@ -368,39 +359,33 @@ async def send_media(
     }
 
     try:
+        if media_info is None:
+            media_info = await prepare_media(media_path, media_type)
+
         if media_type == "photo":
-            return await bot.send_photo(target_chat_id, media_path, **send_kwargs)
+            return await api_call(bot, "upload", bot.send_photo, target_chat_id, media_path, **send_kwargs)
 
         elif media_type == "video":
-            duration, _, _, width, height = await get_media_info(media_path)
-            width = width or 640
-            height = height or 480
-            thumb = await get_video_thumbnail(media_path, duration)
-
-            return await bot.send_video(
+            return await api_call(
+                bot, "upload", bot.send_video,
                 target_chat_id,
                 media_path,
-                duration=duration,
-                width=width,
-                height=height,
-                thumb=thumb,
                 supports_streaming=True,
+                **media_info,
                 **send_kwargs
             )
 
         elif media_type == "audio":
-            duration, artist, title, _, _ = await get_media_info(media_path)
-            return await bot.send_audio(
+            return await api_call(
+                bot, "upload", bot.send_audio,
                 target_chat_id,
                 media_path,
-                duration=duration,
-                performer=artist,
-                title=title,
+                **media_info,
                 **send_kwargs
             )
 
         elif media_type == "document":
-            return await bot.send_document(target_chat_id, media_path, **send_kwargs)
+            return await api_call(bot, "upload", bot.send_document, target_chat_id, media_path, **send_kwargs)
 
     except Exception as e:
         LOGGER(__name__).error(f"Error sending media: {e}")
@@ -408,15 +393,22 @@ async def send_media(
     return None
 
 
-async def download_single_media(msg, progress_message, start_time):
+async def download_single_media(msg, progress_message, start_time, transfer_counter=None):
+    if progress_message:
+        progress = progress_for_pyrogram
+        progress_args = progressArgs("📥 Downloading Progress", progress_message, start_time)
+    elif transfer_counter:
+        progress = count_transfer
+        progress_args = transfer_counter.track()
+    else:
+        progress = None
+        progress_args = ()
+
     try:
-        media_path = await msg.download(
-            progress=progress_for_pyrogram,
-            progress_args=progressArgs(
-                "📥 Downloading Progress",
-                progress_message,
-                start_time
-            )
+        media_path = await api_call(
+            msg._client, "download", msg.download,
+            progress=progress,
+            progress_args=progress_args
         )
 
         parsed_caption = await get_parsed_msg(
@@ -440,8 +432,9 @@ async def download_single_media(msg, progress_message, start_time):
     return "skip", None, None
 
 
-async def processMediaGroup(chat_message, bot, message, destination_chat_id=None):
-    media_group_messages = await chat_message.get_media_group()
+async def processMediaGroup(chat_message, bot, message, destination_chat_id=None, silent=False, transfer_counter=None, media_group_messages=None):
+    if not media_group_messages:
+        media_group_messages = await api_call(chat_message._client, "read", chat_message.get_media_group)
 
     valid_media = []
     temp_paths = []
@@ -450,17 +443,21 @@ async def processMediaGroup(chat_message, bot, message, destination_chat_id=None
     target_chat_id = destination_chat_id or message.chat.id
     start_time = time.time()
 
-    progress_message = await message.reply(
-        f"📥 Downloading media group... ({len(media_group_messages)} files)"
-    )
+    progress_message = None
+    if not silent:
+        progress_message = await api_call(
+            message._client, "edit", message.reply,
+            f"📥 Downloading media group... ({len(media_group_messages)} files)"
+        )
 
     download_tasks = [
-        download_single_media(msg, progress_message, start_time)
+        download_single_media(msg, progress_message, start_time, transfer_counter)
         for msg in media_group_messages
         if msg.photo or msg.video or msg.document or msg.audio
     ]
 
-    results = await asyncio.gather(*download_tasks, return_exceptions=True)
+    with perf.stage("download"):
+        results = await asyncio.gather(*download_tasks, return_exceptions=True)
 
     for result in results:
         if isinstance(result, Exception):
@@ -472,30 +469,37 @@ async def processMediaGroup(chat_message, bot, message, destination_chat_id=None
             valid_media.append(media_obj)
 
     if valid_media:
-        try:
-            sent_group = await bot.send_media_group(target_chat_id, valid_media)
-            await progress_message.delete()
-        except Exception:
-            sent_group = []
-            for media in valid_media:
-                try:
-                    if isinstance(media, InputMediaPhoto):
-                        sent_group.append(await bot.send_photo(target_chat_id, media.media, media.caption))
-                    elif isinstance(media, InputMediaVideo):
-                        sent_group.append(await bot.send_video(target_chat_id, media.media, caption=media.caption))
-                    elif isinstance(media, InputMediaDocument):
-                        sent_group.append(await bot.send_document(target_chat_id, media.media, caption=media.caption))
-                    elif isinstance(media, InputMediaAudio):
-                        sent_group.append(await bot.send_audio(target_chat_id, media.media, caption=media.caption))
-                except Exception:
-                    pass
+        group_size = sum(os.path.getsize(path) for path in temp_paths if os.path.exists(path))
+        BYTES.labels(direction="download").inc(group_size)
+        with perf.stage("upload"):
+            try:
+                sent_group = await api_call(bot, "upload", bot.send_media_group, target_chat_id, valid_media)
+                if progress_message:
+                    await api_call(progress_message._client, "edit", progress_message.delete)
+            except Exception:
+                sent_group = []
+                for media in valid_media:
+                    try:
+                        if isinstance(media, InputMediaPhoto):
+                            sent_group.append(await api_call(bot, "upload", bot.send_photo, target_chat_id, media.media, media.caption))
+                        elif isinstance(media, InputMediaVideo):
+                            sent_group.append(await api_call(bot, "upload", bot.send_video, target_chat_id, media.media, caption=media.caption))
+                        elif isinstance(media, InputMediaDocument):
+                            sent_group.append(await api_call(bot, "upload", bot.send_document, target_chat_id, media.media, caption=media.caption))
+                        elif isinstance(media, InputMediaAudio):
+                            sent_group.append(await api_call(bot, "upload", bot.send_audio, target_chat_id, media.media, caption=media.caption))
+                    except Exception:
+                        pass
 
         for path in temp_paths + invalid_paths:
             cleanup_download(path)
 
+        if sent_group:
+            BYTES.labels(direction="upload").inc(group_size)
         return sent_group[0].id if sent_group else None
 
-    await progress_message.delete()
+    if progress_message:
+        await api_call(progress_message._client, "edit", progress_message.delete)
     for path in invalid_paths:
         cleanup_download(path)
 
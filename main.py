@@ -2,20 +2,23 @@ import os
 import shutil
 import psutil
 import asyncio
-from time import time
+from time import time, monotonic
 from aiohttp import web
 
 from pyrogram.enums import ParseMode
-from pyrogram import Client, filters
-from pyrogram.errors import PeerIdInvalid, BadRequest, FloodWait, FileReferenceExpired
+from pyrogram import Client, filters, idle
+from pyrogram.errors import PeerIdInvalid, BadRequest, FloodWait, FileReferenceExpired, MessageNotModified
 from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton
 
 from helpers.utils import (
     processMediaGroup,
     progressArgs,
     send_media,
+    prepare_media,
     progress_for_pyrogram,
-    refresh_progress_message
+    refresh_progress_message,
+    count_transfer,
+    TransferCounter
 )
 
 from helpers.files import (
@@ -32,6 +35,12 @@ from helpers.msg import (
     get_parsed_msg
 )
 
+from helpers import journal, clone_strategy, forward, history, jobs, metrics, perf
+from helpers.ratelimit import api_call
+from helpers.pool import ClientPool
+from helpers.stages import Stage
+from helpers.stream import get_stream_media, stream_upload, get_media_size, download_parallel
+
 from config import PyroConf
 from logger import LOGGER
 
@@ -44,7 +53,8 @@ bot = Client(
     workers=100,
     parse_mode=ParseMode.MARKDOWN,
     max_concurrent_transmissions=1,
-    sleep_threshold=30,
+    # Let every FloodWait reach api_call, which pauses the whole client and tightens its bucket.
+    sleep_threshold=0,
 )
 
 # Client for user session
@@ -52,12 +62,41 @@ user = Client(
     "user_session",
     workers=100,
     session_string=PyroConf.SESSION_STRING,
-    max_concurrent_transmissions=1,
-    sleep_threshold=30,
+    max_concurrent_transmissions=PyroConf.MAX_CONCURRENT_TRANSMISSIONS,
+    sleep_threshold=0,
 )
 
+# Extra bots (admins in the destination) share uploads and copies with the main bot
+bot_pool = ClientPool([bot] + [
+    Client(
+        f"media_bot_{index}",
+        api_id=PyroConf.API_ID,
+        api_hash=PyroConf.API_HASH,
+        bot_token=bot_token,
+        parse_mode=ParseMode.MARKDOWN,
+        max_concurrent_transmissions=1,
+        sleep_threshold=0,
+        no_updates=True,
+    )
+    for index, bot_token in enumerate(PyroConf.EXTRA_BOT_TOKENS, start=1)
+])
+
+# Extra user sessions share the read/copy/download load with the primary one
+user_pool = ClientPool([user] + [
+    Client(
+        f"user_session_{index}",
+        workers=100,
+        session_string=session_string,
+        max_concurrent_transmissions=PyroConf.MAX_CONCURRENT_TRANSMISSIONS,
+        sleep_threshold=0,
+    )
+    for index, session_string in enumerate(PyroConf.EXTRA_SESSION_STRINGS, start=1)
+])
+
 RUNNING_TASKS = set()
-download_semaphore = None
+ACTIVE_BATCHES = {}  # job_id -> task running execute_batch_logic
+SHUTDOWN_EVENT = asyncio.Event()
+STAGES = {}  # pipeline stage name -> Stage, created in initialize()
 BATCH_STATES = {}  
 
 PIN_PROMPTS = {}
@@ -82,7 +121,7 @@ async def finalize_pin_prompt(user_id: int, timed_out: bool = False):
         event.set()
 
     try:
-        await prompt["prompt_msg"].edit(
+        await api_call(bot, "edit", prompt["prompt_msg"].edit,
             "⏱️ No selection received in 10 seconds. Proceeding without pinning."
             if timed_out
             else ("✅ Pin enabled for this batch." if prompt["pin_first"] else "➡️ Proceeding without pinning.")
@@ -103,11 +142,16 @@ async def pin_prompt_countdown(user_id: int):
         if not current or current.get("done"):
             return
         try:
-            await current["prompt_msg"].edit(
+            await api_call(bot, "edit", current["prompt_msg"].edit,
                 build_pin_prompt_text(seconds_left),
                 reply_markup=current["markup"]
             )
-        except Exception:
+        except MessageNotModified:
+            pass
+        except Exception as e:
+            # Without a visible countdown, stop waiting so the batch is not left blocked.
+            LOGGER(__name__).info(f"Pin prompt countdown failed: {e}")
+            await finalize_pin_prompt(user_id, timed_out=True)
             return
 
     await asyncio.sleep(1)
@@ -125,9 +169,19 @@ async def resolve_target_chat_id(bot: Client, source_message: Message | None = N
     if source_message:
         return source_message.chat.id
     if not bot.me:
-        await bot.get_me()
+        await api_call(bot, "read", bot.get_me)
     return bot.me.id
 
+async def with_uploader(target_chat_id, send):
+    """Run send(uploader) with the least busy healthy bot that can post to the target."""
+    uploader = await bot_pool.pick(target_chat_id)
+    bot_pool.acquire(uploader)
+    try:
+        return await send(uploader)
+    finally:
+        bot_pool.release(uploader)
+
+
 def track_task(coro):
     task = asyncio.create_task(coro)
     RUNNING_TASKS.add(task)
@@ -155,7 +209,7 @@ async def start(_, message: Message):
     markup = InlineKeyboardMarkup(
         [[InlineKeyboardButton("Update Channel", url="https://t.me/itsSmartDev")]]
     )
-    await message.reply(welcome_text, reply_markup=markup, disable_web_page_preview=True)
+    await api_call(bot, "edit", message.reply, welcome_text, reply_markup=markup, disable_web_page_preview=True)
 
 
 @bot.on_message(filters.command("help") & filters.private)
@@ -163,9 +217,10 @@ async def help_command(_, message: Message):
     help_text = (
         "💡 **Media Downloader Bot Help**\n\n"
         "➤ **Single Download**\n"
-        "   – Just paste a link or use `/dl <link>`.\n\n"
+        "   – Just paste a link or use `/dl <link>`.\n"
+        "   – Already mirrored posts are skipped; use `/dl <link> force` to send again.\n\n"
         "➤ **Batch Process (Simple)**\n"
-        "   1. Send `/batch`\n"
+        "   1. Send `/batch` (or `/batch force` to re-send mirrored posts)\n"
         "   2. Send the **Start Link**\n"
         "   3. Send the **Number of Messages** (e.g., 100)\n"
         "   The bot will calculate the range and process them.\n\n"
@@ -176,15 +231,19 @@ async def help_command(_, message: Message):
         "➤ **Requirements**\n"
         "   – Make sure the user client is part of the chat.\n\n"
         "➤ **Management**\n"
+        "   – `/jobs` : List your running batch jobs.\n"
+        "   – `/cancel <job_id>` : Stop one batch job (resumable later).\n"
+        "   – `/resume [job_id]` : Continue an interrupted or stopped batch.\n"
         "   – `/killall` : Cancel all running tasks.\n"
         "   – `/logs` : Get log file.\n"
         "   – `/stats` : System status.\n"
+        "   – `/perf [jobs]` : Stage timings of recent batches.\n"
     )
     
     markup = InlineKeyboardMarkup(
         [[InlineKeyboardButton("Update Channel", url="https://t.me/itsSmartDev")]]
     )
-    await message.reply(help_text, reply_markup=markup, disable_web_page_preview=True)
+    await api_call(bot, "edit", message.reply, help_text, reply_markup=markup, disable_web_page_preview=True)
 
 
 @bot.on_message(filters.command("set") & filters.private)
@@ -192,7 +251,7 @@ async def set_destination(bot: Client, message: Message):
     global DESTINATION_CHAT_ID
     
     if len(message.command) < 2:
-        await message.reply(
+        await api_call(bot, "edit", message.reply,
             "❌ **Usage:** `/set <channel_id>`\n"
             "Example: `/set -100123456789`\n"
             "To reset: `/set none`"
@@ -203,20 +262,20 @@ async def set_destination(bot: Client, message: Message):
 
     if input_arg.lower() == "none":
         DESTINATION_CHAT_ID = None
-        await message.reply("✅ **Destination removed.** Files will now be stored in the bot chat.")
+        await api_call(bot, "edit", message.reply, "✅ **Destination removed.** Files will now be stored in the bot chat.")
         return
 
     try:
         try:
             target_id = int(input_arg)
         except ValueError:
-            chat_obj = await bot.get_chat(input_arg)
+            chat_obj = await api_call(bot, "read", bot.get_chat, input_arg)
             target_id = chat_obj.id
 
         try:
-            sent_msg = await bot.send_message(target_id, "✅ **Destination Channel Connected Successfully!**")
+            sent_msg = await api_call(bot, "edit", bot.send_message, target_id, "✅ **Destination Channel Connected Successfully!**")
         except Exception as e:
-            await message.reply(
+            await api_call(bot, "edit", message.reply,
                 f"❌ **Failed to connect to channel `{target_id}`**.\n\n"
                 f"**Error:** `{e}`\n"
                 "👉 Make sure the Bot is an **Admin** in that channel with post permissions."
@@ -224,239 +283,499 @@ async def set_destination(bot: Client, message: Message):
             return
 
         DESTINATION_CHAT_ID = target_id
-        await message.reply(f"✅ **Destination Channel Set!**\nAll downloads will now be uploaded to ID: `{target_id}`")
+        await api_call(bot, "edit", message.reply, f"✅ **Destination Channel Set!**\nAll downloads will now be uploaded to ID: `{target_id}`")
         LOGGER(__name__).info(f"Destination channel set to {target_id} by user {message.from_user.id}")
 
     except Exception as e:
-        await message.reply(f"❌ **Error:** {str(e)}")
+        await api_call(bot, "edit", message.reply, f"❌ **Error:** {str(e)}")
+
+
+# -------------------------------------------------------------------------------------
+# CLONE STRATEGIES
+# Each returns the first sent message ID, or raises if the path does not work.
+# `session` is the user client chosen from the pool for this post.
+# -------------------------------------------------------------------------------------
+async def copy_album(client: Client, chat_id, message_id: int, target_chat_id, album: list = None):
+    # With the album's messages already fetched, one forward without the author
+    # replaces copy_media_group's extra get_media_group read.
+    if album:
+        return await api_call(client, "copy", client.forward_messages, chat_id=target_chat_id, from_chat_id=chat_id, message_ids=[msg.id for msg in album], drop_author=True)
+    return await api_call(client, "copy", client.copy_media_group, chat_id=target_chat_id, from_chat_id=chat_id, message_id=message_id)
+
+
+async def clone_via_user(bot: Client, session: Client, chat_message: Message, chat_id, message_id: int, target_chat_id, album: list = None):
+    if chat_message.media_group_id:
+        copied_group = await copy_album(session, chat_id, message_id, target_chat_id, album)
+        return copied_group[0].id if copied_group else None
+    copied_msg = await api_call(session, "copy", session.copy_message, chat_id=target_chat_id, from_chat_id=chat_id, message_id=message_id)
+    return copied_msg.id if copied_msg else None
+
+
+async def clone_via_bot(bot: Client, session: Client, chat_message: Message, chat_id, message_id: int, target_chat_id, album: list = None):
+    copier = await bot_pool.pick(target_chat_id, chat_id)
+    bot_pool.acquire(copier)
+    try:
+        if chat_message.media_group_id:
+            copied_group = await copy_album(copier, chat_id, message_id, target_chat_id, album)
+            return copied_group[0].id if copied_group else None
+        copied_msg = await api_call(copier, "copy", copier.copy_message, chat_id=target_chat_id, from_chat_id=chat_id, message_id=message_id)
+        return copied_msg.id if copied_msg else None
+    finally:
+        bot_pool.release(copier)
+
+
+async def clone_via_relay(bot: Client, session: Client, chat_message: Message, chat_id, message_id: int, target_chat_id, album: list = None):
+    # User copies into the bot chat, then the bot copies from there to the target.
+    if not bot.me:
+        await api_call(bot, "read", bot.get_me)
+    bot_username = bot.me.username
+
+    if chat_message.media_group_id:
+        relayed_msgs = await copy_album(session, chat_id, message_id, bot_username, album)
+        if not relayed_msgs:
+            raise ValueError("Relay returned no messages")
+        copied_group = await copy_album(bot, bot.me.id, relayed_msgs[0].id, target_chat_id, relayed_msgs)
+        return copied_group[0].id if copied_group else None
+
+    relayed_msg = await api_call(session, "copy", session.copy_message, chat_id=bot_username, from_chat_id=chat_id, message_id=message_id)
+    copied_msg = await api_call(bot, "copy", bot.copy_message, chat_id=target_chat_id, from_chat_id=bot.me.id, message_id=relayed_msg.id)
+    try:
+        await api_call(session, "edit", relayed_msg.delete)
+    except:
+        pass
+    return copied_msg.id if copied_msg else None
+
+
+CLONE_STRATEGIES = {
+    "user": clone_via_user,
+    "bot": clone_via_bot,
+    "relay": clone_via_relay,
+}
 
 
 # -------------------------------------------------------------------------------------
 # CORE DOWNLOAD LOGIC
 # -------------------------------------------------------------------------------------
-async def handle_download(bot: Client, message: Message, post_url: str, silent: bool = False, pre_fetched_msg=None, abort_event: asyncio.Event = None):
+async def handle_download(bot: Client, message: Message, post_url: str, job_id: int = None, **kwargs):
+    # Every post is counted under the path that finished it ("fetch" if it never got past fetching).
+    trace = {"path": "fetch"}
+    started = monotonic()
+    timer, token = perf.start_item(post_url, job_id)
+    status = "aborted"  # unless process_post returns; it only raises when cancelled
+    try:
+        result = await process_post(bot, message, post_url, trace=trace, **kwargs)
+        status = result.get("status") if isinstance(result, dict) else result
+        return result
+    finally:
+        perf.finish_item(timer, token, trace["path"], status)
+        metrics.record_item(trace["path"], status, monotonic() - started, jobs.current_lane.get())
+
+
+async def process_post(bot: Client, message: Message, post_url: str, silent: bool = False, pre_fetched_msg=None, abort_event: asyncio.Event = None, destination_chat_id=None, force: bool = False, transfer_counter=None, trace: dict = None, album: list = None):
+    # `album` holds every pre-fetched message of pre_fetched_msg's media group, so it is handled once.
     # If abort signal is triggered globally, exit instantly.
     if abort_event and abort_event.is_set():
         return "aborted"
 
-    async with download_semaphore:
+    async with STAGES["fetch"].slot() as fetch_slot:
         if abort_event and abort_event.is_set():
             return "aborted"
             
         if "?" in post_url:
             post_url = post_url.split("?", 1)[0]
 
-        target_chat_id = await resolve_target_chat_id(bot, message)
+        target_chat_id = destination_chat_id or await resolve_target_chat_id(bot, message)
         progress_message = None
+        session = None
 
         try:
             chat_id, message_id, thread_id = getChatMsgID(post_url)
+
+            # Keep the session that fetched the message unless it is in FloodWait.
+            fetched_by = pre_fetched_msg._client if pre_fetched_msg else None
+            session = await user_pool.pick(chat_id, preferred=fetched_by)
+            user_pool.acquire(session)
             
-            if pre_fetched_msg:
+            if pre_fetched_msg and fetched_by is session:
                 chat_message = pre_fetched_msg
+            elif album:
+                with perf.stage("fetch"):
+                    album = await api_call(session, "read", session.get_messages, chat_id=chat_id, message_ids=[msg.id for msg in album])
+                chat_message = album[0]
             else:
-                chat_message = await user.get_messages(chat_id=chat_id, message_ids=message_id)
+                with perf.stage("fetch"):
+                    chat_message = await api_call(session, "read", session.get_messages, chat_id=chat_id, message_ids=message_id)
             
             LOGGER(__name__).info(f"Processing URL: {post_url}")
-            cloned = False
-            
-            # --- CLONE ATTEMPTS ---
-            try:
-                if chat_message.media_group_id:
-                    copied_group = await user.copy_media_group(chat_id=target_chat_id, from_chat_id=chat_id, message_id=message_id)
-                else:
-                    copied_msg = await user.copy_message(chat_id=target_chat_id, from_chat_id=chat_id, message_id=message_id)
-                cloned = True
-                LOGGER(__name__).info(f"Directly cloned via User: {post_url}")
-            except FloodWait as e:
-                raise e # DO NOT MASK FLOODWAIT!
-            except Exception as e_user:
-                LOGGER(__name__).info(f"User direct clone failed: {e_user}")
 
+            # --- CLONE INDEX: skip posts already mirrored to this destination ---
+            source_chat_id = chat_message.chat.id if chat_message.chat else chat_id
+            if not force:
+                mirrored_id = journal.get_clone(source_chat_id, message_id, target_chat_id)
+                if mirrored_id:
+                    LOGGER(__name__).info(f"Already mirrored {post_url} as {mirrored_id}, skipping.")
+                    trace["path"] = "index"
+                    if not silent and not pre_fetched_msg:
+                        await api_call(bot, "edit", message.reply,
+                            f"**✅ Already mirrored** (message `{mirrored_id}`).\n"
+                            f"Use `/dl {post_url} force` to send it again."
+                        )
+                    return {"status": "success", "sent_msg_id": mirrored_id}
+
+            def mirrored(sent_msg_id):
+                if sent_msg_id:
+                    # Every album member maps to the album's first sent message.
+                    for source_id in ([msg.id for msg in album] if album else [message_id]):
+                        journal.record_clone(source_chat_id, source_id, target_chat_id, sent_msg_id)
+                return {"status": "success", "sent_msg_id": sent_msg_id}
+
+            # --- CLONE ATTEMPTS (best known path for this chat first) ---
+            protected = clone_strategy.is_protected(chat_message)
+            for strategy in clone_strategy.plan(source_chat_id, protected):
+                if strategy == "download":
+                    break
                 try:
-                    if chat_message.media_group_id:
-                        copied_group = await bot.copy_media_group(chat_id=target_chat_id, from_chat_id=chat_id, message_id=message_id)
-                    else:
-                        copied_msg = await bot.copy_message(chat_id=target_chat_id, from_chat_id=chat_id, message_id=message_id)
-                    cloned = True
-                    LOGGER(__name__).info(f"Directly cloned via Bot: {post_url}")
+                    with perf.stage(f"clone_{strategy}"):
+                        sent_msg_id = await CLONE_STRATEGIES[strategy](bot, session, chat_message, chat_id, message_id, target_chat_id, album)
                 except FloodWait as e:
-                    raise e
-                except Exception as e_bot:
-                    LOGGER(__name__).info(f"Bot direct clone failed: {e_bot}")
-
-                    try:
-                        if not bot.me:
-                            await bot.get_me()
-                        bot_username = bot.me.username
-                        
-                        if chat_message.media_group_id:
-                            relayed_msgs = await user.copy_media_group(chat_id=bot_username, from_chat_id=chat_id, message_id=message_id)
-                            if relayed_msgs:
-                                copied_group = await bot.copy_media_group(chat_id=target_chat_id, from_chat_id=bot.me.id, message_id=relayed_msgs[0].id)
-                        else:
-                            relayed_msg = await user.copy_message(chat_id=bot_username, from_chat_id=chat_id, message_id=message_id)
-                            copied_msg = await bot.copy_message(chat_id=target_chat_id, from_chat_id=bot.me.id, message_id=relayed_msg.id)
-                            try:
-                                await relayed_msg.delete()
-                            except:
-                                pass
-                        cloned = True
-                        LOGGER(__name__).info(f"Relay clone success: {post_url}")
+                    raise e # DO NOT MASK FLOODWAIT!
+                except Exception as e_clone:
+                    LOGGER(__name__).info(f"{strategy.capitalize()} clone failed: {e_clone}")
+                    metrics.CLONE_ATTEMPTS.labels(path=strategy, result="failed").inc()
+                    continue
 
-                    except FloodWait as e:
-                        raise e
-                    except Exception as e_relay:
-                        LOGGER(__name__).info(f"Relay clone failed: {e_relay}")
-
-            if cloned:
-                await asyncio.sleep(PyroConf.FLOOD_WAIT_DELAY)
-                sent_msg_id = None
-                if "copied_group" in locals() and copied_group:
-                    sent_msg_id = copied_group[0].id
-                elif "copied_msg" in locals() and copied_msg:
-                    sent_msg_id = copied_msg.id
-                return {"status": "success", "sent_msg_id": sent_msg_id}
+                metrics.CLONE_ATTEMPTS.labels(path=strategy, result="success").inc()
+                trace["path"] = strategy
+                clone_strategy.record_success(source_chat_id, strategy)
+                LOGGER(__name__).info(f"Cloned via {strategy.capitalize()}: {post_url}")
+                return mirrored(sent_msg_id)
 
             # --- FALLBACK: DOWNLOAD & UPLOAD ---
+            trace["path"] = "download"
             if chat_message.document or chat_message.video or chat_message.audio:
                 file_size = (
                     chat_message.document.file_size if chat_message.document
                     else chat_message.video.file_size if chat_message.video
                     else chat_message.audio.file_size
                 )
-                if not await fileSizeLimit(file_size, message, "download", user.me.is_premium):
+                if not await fileSizeLimit(file_size, message, "download", session.me.is_premium):
                     return "error"
 
             parsed_caption = await get_parsed_msg(chat_message.caption or "", chat_message.caption_entities)
             parsed_text = await get_parsed_msg(chat_message.text or "", chat_message.entities)
 
+            # Downloads and uploads have their own limits; free the fetch slot for the next post.
+            if chat_message.media_group_id or chat_message.media:
+                fetch_slot.release()
+
             if chat_message.media_group_id:
-                sent_msg_id = await processMediaGroup(chat_message, bot, message, destination_chat_id=target_chat_id)
+                # The album downloads every item before sending, so it holds both stages.
+                async with STAGES["download"].slot(), STAGES["upload"].slot():
+                    sent_msg_id = await with_uploader(
+                        target_chat_id,
+                        lambda uploader: processMediaGroup(
+                            chat_message, uploader, message, destination_chat_id=target_chat_id,
+                            silent=silent, transfer_counter=transfer_counter, media_group_messages=album
+                        )
+                    )
                 if not sent_msg_id:
                     if not silent:
-                        await message.reply("**Could not extract any valid media from the media group.**")
-                return {"status": "success", "sent_msg_id": sent_msg_id}
+                        await api_call(bot, "edit", message.reply, "**Could not extract any valid media from the media group.**")
+                else:
+                    clone_strategy.record_success(source_chat_id, "download")
+                return mirrored(sent_msg_id)
 
             elif chat_message.media:
                 start_time = time()
                 
                 if not silent:
-                    progress_message = await message.reply("**⏳ Initializing...**")
+                    progress_message = await api_call(bot, "edit", message.reply, "**⏳ Initializing...**")
                     progress_func = progress_for_pyrogram
                     progress_action_str = f"📥 Downloading (ID: {message_id})"
                     prog_args = progressArgs(progress_action_str, progress_message, start_time)
+                elif transfer_counter:
+                    # Batch items have no message of their own; their bytes feed the batch dashboard.
+                    progress_func = count_transfer
+                    prog_args = transfer_counter.track()
                 else:
                     progress_func = None
                     prog_args = None
 
-                filename = get_file_name(message_id, chat_message)
-                download_path = get_download_path(message.id, filename)
-
-                try:
-                    media_path = await chat_message.download(
-                        file_name=download_path,
-                        progress=progress_func,
-                        progress_args=prog_args,
-                    )
-                except FileReferenceExpired:
-                    LOGGER(__name__).info(f"File reference expired for {post_url}, refetching message and retrying download once.")
-                    chat_message = await user.get_messages(chat_id=chat_id, message_ids=message_id)
-                    media_path = await chat_message.download(
-                        file_name=download_path,
-                        progress=progress_func,
-                        progress_args=prog_args,
-                    )
-
-                if not media_path or not os.path.exists(media_path):
-                    if progress_message: await progress_message.edit("**❌ Download failed: File not saved properly**")
-                    return "error"
-
-                file_size = os.path.getsize(media_path)
-                if file_size == 0:
-                    if progress_message: await progress_message.edit("**❌ Download failed: File is empty**")
-                    cleanup_download(media_path)
-                    return "error"
-
-                LOGGER(__name__).info(f"Downloaded media: {media_path} (Size: {file_size} bytes)")
-
                 media_type = (
                     "photo" if chat_message.photo
                     else "video" if chat_message.video
                     else "audio" if chat_message.audio
                     else "document"
                 )
-                
-                sent_msg = await send_media(
-                    bot, message, media_path, media_type, parsed_caption,
-                    progress_message, start_time, destination_chat_id=target_chat_id
-                )
 
-                cleanup_download(media_path)
-                
+                # --- STREAMING: pipe large files straight into the upload, no disk ---
+                if PyroConf.STREAM_UPLOADS and get_stream_media(chat_message, media_type):
+                    if progress_message:
+                        prog_args = progressArgs(f"📤 Streaming (ID: {message_id})", progress_message, start_time)
+                    try:
+                        async with STAGES["download"].slot(), STAGES["upload"].slot():
+                            with perf.stage("stream"):
+                                # stream_upload charges each side to its own client's budget.
+                                sent_msg = await with_uploader(
+                                    target_chat_id,
+                                    lambda uploader: stream_upload(
+                                        session, uploader, chat_message, media_type, target_chat_id,
+                                        parsed_caption, progress_func, prog_args
+                                    )
+                                )
+                    except FloodWait as e:
+                        raise e
+                    except Exception as e:
+                        LOGGER(__name__).warning(f"Streaming failed for {post_url}, falling back to disk: {e}")
+                        sent_msg = None
+
+                    if sent_msg:
+                        if progress_message:
+                            await api_call(bot, "edit", progress_message.delete)
+                        streamed_size = get_media_size(chat_message)
+                        metrics.BYTES.labels(direction="download").inc(streamed_size)
+                        metrics.BYTES.labels(direction="upload").inc(streamed_size)
+                        clone_strategy.record_success(source_chat_id, "download")
+                        return mirrored(sent_msg.id)
+
+                    if progress_message:
+                        prog_args = progressArgs(progress_action_str, progress_message, start_time)
+
+                filename = get_file_name(message_id, chat_message)
+
+                async def download_file():
+                    # A batch's items share one folder that is removed whenever it empties,
+                    # so it is created only once this item holds its slots.
+                    download_path = get_download_path(message.id, filename)
+                    with perf.stage("download"):
+                        # Large files are fetched as several byte ranges over parallel connections.
+                        if PyroConf.PARALLEL_DOWNLOAD_PARTS > 1 and get_media_size(chat_message) >= PyroConf.PARALLEL_DOWNLOAD_MIN_SIZE:
+                            return await api_call(
+                                session, "download", download_parallel,
+                                session, chat_message, download_path, PyroConf.PARALLEL_DOWNLOAD_PARTS,
+                                progress_func, prog_args or (),
+                            )
+                        return await api_call(
+                            session, "download", chat_message.download,
+                            file_name=download_path,
+                            progress=progress_func,
+                            progress_args=prog_args,
+                        )
+
+                # A staged slot covers a file from the start of its download until it is
+                # uploaded, which bounds how many downloaded files wait on disk.
+                async with STAGES["staged"].slot():
+                    async with STAGES["download"].slot():
+                        try:
+                            media_path = await download_file()
+                        except FileReferenceExpired:
+                            LOGGER(__name__).info(f"File reference expired for {post_url}, refetching message and retrying download once.")
+                            chat_message = await api_call(session, "read", session.get_messages, chat_id=chat_id, message_ids=message_id)
+                            media_path = await download_file()
+
+                    if not media_path or not os.path.exists(media_path):
+                        if progress_message: await api_call(bot, "edit", progress_message.edit, "**❌ Download failed: File not saved properly**")
+                        return "error"
+
+                    file_size = os.path.getsize(media_path)
+                    if file_size == 0:
+                        if progress_message: await api_call(bot, "edit", progress_message.edit, "**❌ Download failed: File is empty**")
+                        cleanup_download(media_path)
+                        return "error"
+
+                    LOGGER(__name__).info(f"Downloaded media: {media_path} (Size: {file_size} bytes)")
+                    metrics.BYTES.labels(direction="download").inc(file_size)
+
+                    media_info = {}
+                    try:
+                        async with STAGES["process"].slot():
+                            media_info = await prepare_media(media_path, media_type, source_message=chat_message)
+
+                        async with STAGES["upload"].slot():
+                            with perf.stage("upload"):
+                                sent_msg = await with_uploader(
+                                    target_chat_id,
+                                    lambda uploader: send_media(
+                                        uploader, message, media_path, media_type, parsed_caption,
+                                        progress_message, start_time, destination_chat_id=target_chat_id,
+                                        media_info=media_info
+                                    )
+                                )
+                    finally:
+                        if media_info.get("thumb"):
+                            cleanup_download(media_info["thumb"])
+                        cleanup_download(media_path)
+
                 if progress_message:
-                    await progress_message.delete()
-                    
-                return {"status": "success", "sent_msg_id": sent_msg.id if sent_msg else None}
+                    await api_call(bot, "edit", progress_message.delete)
+
+                if sent_msg:
+                    metrics.BYTES.labels(direction="upload").inc(file_size)
+                    clone_strategy.record_success(source_chat_id, "download")
+                return mirrored(sent_msg.id if sent_msg else None)
 
             elif chat_message.text or chat_message.caption:
-                sent_msg = await bot.send_message(target_chat_id, parsed_text or parsed_caption)
-                return {"status": "success", "sent_msg_id": sent_msg.id}
+                trace["path"] = "text"
+                with perf.stage("upload"):
+                    sent_msg = await with_uploader(
+                        target_chat_id,
+                        lambda uploader: api_call(uploader, "upload", uploader.send_message, target_chat_id, parsed_text or parsed_caption)
+                    )
+                return mirrored(sent_msg.id)
             else:
                 if not silent:
-                    await message.reply("**No media or text found in the post URL.**")
+                    await api_call(bot, "edit", message.reply, "**No media or text found in the post URL.**")
                 return "error"
 
         # --- GLOBAL ERROR HANDLING & ABORT LOGIC ---
         except FloodWait as e:
-            if abort_event and not abort_event.is_set():
-                abort_event.set() # Trigger global shut down
-                await message.reply(f"🚨 **FloodWait Triggered!**\nTelegram requires a wait of `{e.value}` seconds. Process Aborted.")
             if progress_message:
-                await progress_message.delete()
+                await api_call(bot, "edit", progress_message.delete)
+            if e.value <= PyroConf.FLOOD_WAIT_MAX_PAUSE:
+                # api_call has paused the client; the caller re-queues this item.
+                LOGGER(__name__).info(f"FloodWait {e.value}s while processing {post_url}, re-queueing.")
+                return {"status": "retry", "wait": e.value}
+            if abort_event and not abort_event.is_set():
+                abort_event.set() # Too long to wait it out: stop the batch
+                await api_call(bot, "edit", message.reply, f"🚨 **FloodWait Triggered!**\nTelegram requires a wait of `{e.value}` seconds. Process Aborted.")
             return "aborted"
             
         except (PeerIdInvalid, BadRequest, KeyError):
             if abort_event and abort_event.is_set(): return "aborted"
             err = f"**Error processing {post_url}: User client likely not in chat.**"
             if not silent:
-                if progress_message: await progress_message.edit(err)
-                else: await message.reply(err)
+                if progress_message: await api_call(bot, "edit", progress_message.edit, err)
+                else: await api_call(bot, "edit", message.reply, err)
             return "error"
             
         except Exception as e:
             if "FLOOD_WAIT" in str(e).upper():
                 if abort_event and not abort_event.is_set():
                     abort_event.set()
-                    await message.reply(f"🚨 **FloodWait Triggered!**\nProcess Aborted.")
+                    await api_call(bot, "edit", message.reply, f"🚨 **FloodWait Triggered!**\nProcess Aborted.")
                 if progress_message:
-                    await progress_message.delete()
+                    await api_call(bot, "edit", progress_message.delete)
                 return "aborted"
                 
             if abort_event and abort_event.is_set(): return "aborted"
             
             error_message = f"**❌ Error at {post_url}: {str(e)}**"
             if not silent:
-                if progress_message: await progress_message.edit(error_message)
-                else: await message.reply(error_message)
+                if progress_message: await api_call(bot, "edit", progress_message.edit, error_message)
+                else: await api_call(bot, "edit", message.reply, error_message)
             LOGGER(__name__).error(e)
             return "error"
 
+        finally:
+            if session:
+                user_pool.release(session)
+
+
+async def clone_bulk(bot: Client, message: Message, post_url: str, groups: list, target_chat_id, abort_event: asyncio.Event = None, job_id: int = None):
+    """Forward a run of posts without their author in a single call.
+
+    `groups` holds the posts of the run, each a list of messages (several for
+    an album). Returns {"status": "success", "sent": {source_id: sent_msg_id},
+    "unsent": [groups Telegram did not forward]}, a retry status after a short
+    FloodWait, or "fallback" so the caller handles each post on its own.
+    Posts handed back to the per-post path are counted there, not here.
+    """
+    items = [msg for group in groups for msg in group]
+    chat_id = items[0].chat.id
+    message_ids = [msg.id for msg in items]
+    started = monotonic()
+    timer, token = perf.start_item(post_url, job_id)
+    status = "aborted"
+    try:
+        strategy = clone_strategy.bulk_strategy(chat_id, clone_strategy.is_protected(items[0]))
+        if not strategy:
+            status = "fallback"
+            return status
+
+        async with STAGES["fetch"].slot():
+            if abort_event and abort_event.is_set():
+                return status
+            if strategy == "bot":
+                pool, copier = bot_pool, await bot_pool.pick(target_chat_id, chat_id)
+            else:
+                pool, copier = user_pool, await user_pool.pick(chat_id, preferred=items[0]._client)
+            pool.acquire(copier)
+            try:
+                with perf.stage(f"clone_{strategy}"):
+                    sent = await api_call(copier, "copy", forward.forward_run, copier, target_chat_id, chat_id, message_ids)
+            except FloodWait as e:
+                if e.value <= PyroConf.FLOOD_WAIT_MAX_PAUSE:
+                    status = "retry"
+                    return {"status": status, "wait": e.value}
+                if abort_event and not abort_event.is_set():
+                    abort_event.set()
+                    await api_call(bot, "edit", message.reply, f"🚨 **FloodWait Triggered!**\nTelegram requires a wait of `{e.value}` seconds. Process Aborted.")
+                return status
+            except Exception as e:
+                LOGGER(__name__).info(f"Bulk clone of {len(message_ids)} posts from {post_url} failed, falling back per post: {e}")
+                metrics.CLONE_ATTEMPTS.labels(path=f"bulk_{strategy}", result="failed").inc()
+                status = "fallback"
+                return status
+            finally:
+                pool.release(copier)
+
+        if not sent:
+            status = "fallback"
+            return status
+        if len(sent) < len(message_ids):
+            LOGGER(__name__).warning(f"Bulk clone from {post_url} forwarded {len(sent)} of {len(message_ids)} posts")
+
+        metrics.CLONE_ATTEMPTS.labels(path=f"bulk_{strategy}", result="success").inc()
+        clone_strategy.record_success(chat_id, strategy)
+        # Only pairs Telegram confirmed are indexed; refused posts must not count as mirrored.
+        for source_id, sent_msg_id in sent.items():
+            journal.record_clone(chat_id, source_id, target_chat_id, sent_msg_id)
+        unsent = [group for group in groups if not any(msg.id in sent for msg in group)]
+        dropped = len(message_ids) - len(sent) - sum(len(group) for group in unsent)
+        status = "success"
+        return {"status": status, "sent": sent, "unsent": unsent}
+    finally:
+        perf.finish_item(timer, token, "bulk", status)
+        if status == "success":
+            metrics.ITEMS.labels(path="bulk", result="success").inc(len(sent))
+            if dropped:
+                metrics.ITEMS.labels(path="bulk", result="error").inc(dropped)
+            metrics.ITEM_SECONDS.labels(lane=jobs.current_lane.get(), path="bulk").observe(monotonic() - started)
+        elif status != "fallback":
+            metrics.ITEMS.labels(path="bulk", result=status).inc(len(message_ids))
+
+
+async def run_single_download(bot: Client, message: Message, post_url: str, force: bool = False):
+    jobs.current_user.set(message.from_user.id)
+    jobs.current_lane.set(jobs.INTERACTIVE)
+    # Short FloodWaits pause the client and the download is retried instead of failing.
+    for attempt in range(PyroConf.FLOOD_WAIT_MAX_RETRIES + 1):
+        result = await handle_download(bot, message, post_url, silent=False, force=force)
+        if not (isinstance(result, dict) and result.get("status") == "retry"):
+            return result
+        if attempt == 0:
+            await api_call(bot, "edit", message.reply,
+                f"⏸️ **FloodWait:** waiting `{result['wait']}` seconds, then retrying automatically."
+            )
+    await api_call(bot, "edit", message.reply, "🚨 **FloodWait Triggered!**\nGave up after repeated FloodWaits, try again later.")
+    return "error"
+
 
 @bot.on_message(filters.command("dl") & filters.private)
 async def download_media_cmd(bot: Client, message: Message):
     if len(message.command) < 2:
-        await message.reply("**Provide a post URL after the /dl command.**")
+        await api_call(bot, "edit", message.reply, "**Provide a post URL after the /dl command.**")
         return
     post_url = message.command[1]
+    force = len(message.command) > 2 and message.command[2].lower() == "force"
     
     try:
-        await track_task(handle_download(bot, message, post_url, silent=False))
+        await track_task(run_single_download(bot, message, post_url, force=force))
     except FloodWait as e:
-        await message.reply(f"🚨 **FloodWait Triggered!**\nTelegram requires a wait of `{e.value}` seconds.")
+        await api_call(bot, "edit", message.reply, f"🚨 **FloodWait Triggered!**\nTelegram requires a wait of `{e.value}` seconds.")
     except Exception as e:
         if "FLOOD_WAIT" in str(e).upper():
-             await message.reply(f"🚨 **FloodWait Triggered!**")
+             await api_call(bot, "edit", message.reply, f"🚨 **FloodWait Triggered!**")
 
 
 # -------------------------------------------------------------------------------------
@@ -464,14 +783,16 @@ async def download_media_cmd(bot: Client, message: Message):
 # -------------------------------------------------------------------------------------
 @bot.on_message(filters.command("batch") & filters.private)
 async def batch_command_start(bot: Client, message: Message):
-    BATCH_STATES[message.from_user.id] = {'step': 'ask_link'}
-    await message.reply(
+    force = len(message.command) > 1 and message.command[1].lower() == "force"
+    BATCH_STATES[message.from_user.id] = {'step': 'ask_link', 'force': force}
+    await api_call(bot, "edit", message.reply,
         "🚀 **Batch Mode Initiated**\n\n"
-        "Please send the **Start Link** of the first post you want to download."
+        + ("♻️ Force mode: already mirrored posts will be sent again.\n\n" if force else "")
+        + "Please send the **Start Link** of the first post you want to download."
     )
 
 
-@bot.on_message(filters.private & ~filters.command(["start", "help", "dl", "batch", "stats", "logs", "killall", "set"]))
+@bot.on_message(filters.private & ~filters.command(["start", "help", "dl", "batch", "stats", "perf", "logs", "killall", "set", "resume", "jobs", "cancel"]))
 async def handle_text_and_states(bot: Client, message: Message):
     user_id = message.from_user.id
     state = BATCH_STATES.get(user_id)
@@ -479,12 +800,12 @@ async def handle_text_and_states(bot: Client, message: Message):
     if state:
         if state['step'] == 'ask_link':
             if not message.text.startswith("https://t.me/"):
-                await message.reply("❌ Invalid link. Please send a valid Telegram post link (e.g., https://t.me/channel/100).")
+                await api_call(bot, "edit", message.reply, "❌ Invalid link. Please send a valid Telegram post link (e.g., https://t.me/channel/100).")
                 return
             
             BATCH_STATES[user_id]['start_link'] = message.text
             BATCH_STATES[user_id]['step'] = 'ask_count'
-            await message.reply(
+            await api_call(bot, "edit", message.reply,
                 "✅ Link accepted.\n\n"
                 "**How many messages** do you want to process starting from there?\n"
                 "(Send a number, e.g., `100`)"
@@ -493,11 +814,12 @@ async def handle_text_and_states(bot: Client, message: Message):
 
         elif state['step'] == 'ask_count':
             if not message.text.isdigit():
-                await message.reply("❌ Please send a valid number.")
+                await api_call(bot, "edit", message.reply, "❌ Please send a valid number.")
                 return
             
             count = int(message.text)
             start_link = BATCH_STATES[user_id]['start_link']
+            force = BATCH_STATES[user_id].get('force', False)
             
             del BATCH_STATES[user_id]
 
@@ -505,7 +827,7 @@ async def handle_text_and_states(bot: Client, message: Message):
                 InlineKeyboardButton("✅ Yes", callback_data=f"pin_decision:yes:{user_id}"),
                 InlineKeyboardButton("❌ No", callback_data=f"pin_decision:no:{user_id}"),
             ]])
-            prompt_msg = await message.reply(build_pin_prompt_text(10), reply_markup=markup)
+            prompt_msg = await api_call(bot, "edit", message.reply, build_pin_prompt_text(10), reply_markup=markup)
 
             decision_event = asyncio.Event()
             PIN_PROMPTS[user_id] = {
@@ -519,12 +841,8 @@ async def handle_text_and_states(bot: Client, message: Message):
             }
 
             track_task(pin_prompt_countdown(user_id))
-            await decision_event.wait()
-
-            prompt = PIN_PROMPTS.pop(user_id, None)
-            pin_first = prompt.get("pin_first", False) if prompt else False
-
-            await execute_batch_logic(bot, message, start_link, count, pin_first=pin_first)
+            # The batch runs as a background job so this handler returns right away.
+            track_task(start_batch_job(bot, message, start_link, count, force=force))
             return
 
     if message.text and not message.text.startswith("/"):
@@ -533,140 +851,588 @@ async def handle_text_and_states(bot: Client, message: Message):
             LOGGER(__name__).info(f"Ignoring non-link private message in idle mode: {message.text[:80]}")
             return
         try:
-            await track_task(handle_download(bot, message, message.text, silent=False))
+            await track_task(run_single_download(bot, message, message.text))
         except FloodWait as e:
-            await message.reply(f"🚨 **FloodWait Triggered!**\nWait `{e.value}` seconds.")
+            await api_call(bot, "edit", message.reply, f"🚨 **FloodWait Triggered!**\nWait `{e.value}` seconds.")
+
+
+async def start_batch_job(bot: Client, message: Message, start_link: str, count: int, force: bool = False):
+    user_id = message.from_user.id
+    prompt = PIN_PROMPTS.get(user_id)
+    if prompt:
+        await prompt["event"].wait()
+    prompt = PIN_PROMPTS.pop(user_id, None)
+    pin_first = prompt.get("pin_first", False) if prompt else False
 
+    try:
+        getChatMsgID(start_link)
+    except Exception as e:
+        return await api_call(bot, "edit", message.reply, f"**❌ Error parsing start link:\n{e}**")
+
+    target_chat_id = await resolve_target_chat_id(bot, message)
+    job_id = journal.create_job(user_id, message.chat.id, start_link, count, target_chat_id, pin_first, force)
+    submit_job(bot, journal.get_job(job_id), message)
 
-# Helper to run the batch loop (NOW HIGHLY OPTIMIZED WITH BULK FETCH)
-async def execute_batch_logic(bot: Client, message: Message, start_link: str, count: int, pin_first: bool = False):
+
+# Helper to run the batch loop (bulk fetch + sliding-window dispatch)
+async def execute_batch_logic(bot: Client, message: Message, start_link: str, count: int, pin_first: bool = False, job_id: int = None, force: bool = False):
     try:
         start_chat, start_id, start_thread_id = getChatMsgID(start_link)
     except Exception as e:
-        return await message.reply(f"**❌ Error parsing start link:\n{e}**")
+        return await api_call(bot, "edit", message.reply, f"**❌ Error parsing start link:\n{e}**")
 
     end_id = start_id + count - 1
     prefix = start_link.rsplit("/", 1)[0]
+
+    # Every batch is journaled so it can survive a restart.
+    if job_id is None:
+        target_chat_id = await resolve_target_chat_id(bot, message)
+        job_id = journal.create_job(message.from_user.id, message.chat.id, start_link, count, target_chat_id, pin_first, force)
+        records = {}
+    else:
+        target_chat_id = journal.get_job(job_id)["destination"]
+        journal.set_job_status(job_id, journal.JOB_RUNNING)
+        records = journal.get_item_records(job_id)
+
+    ACTIVE_BATCHES[job_id] = asyncio.current_task()
     
     thread_text = f"\n**Topic/Thread Filter Active**: ID `{start_thread_id}`" if start_thread_id else ""
-    loading = await message.reply(
-        f"📥 **Starting Batch Process**\n"
-        f"From: `{start_id}`\n"
-        f"To: `{end_id}`\n"
-        f"Total Range Checked: `{count}` posts{thread_text}"
-    )
+    resume_text = f"\nResuming: `{len(records)}` posts already journaled" if records else ""
+    try:
+        loading = await api_call(bot, "edit", message.reply,
+            f"📥 **Starting Batch Process** (Job `#{job_id}`)\n"
+            f"From: `{start_id}`\n"
+            f"To: `{end_id}`\n"
+            f"Total Range Checked: `{count}` posts{thread_text}{resume_text}\n"
+            f"Use `/cancel {job_id}` to stop it."
+        )
+    except BaseException as e:
+        # Nothing was dispatched yet: a cancel or a failed reply leaves the job for /resume.
+        ACTIVE_BATCHES.pop(job_id, None)
+        journal.set_job_status(job_id, journal.JOB_STOPPED)
+        LOGGER(__name__).warning(f"Batch job #{job_id} stopped before starting: {e!r}")
+        raise
 
     downloaded = skipped = failed = 0
-    first_pinned_msg_id = None
-    batch_tasks = []
+    first_pinned = None # (source_msg_id, sent_msg_id) of the lowest successful post
+    in_flight = {} # task -> source messages (several for an album or a bulk clone)
+    bulk_groups = {} # bulk clone task -> the posts it forwards, each a list of messages
     BATCH_SIZE = PyroConf.BATCH_SIZE
+
+    # Items committed by a previous run are not fetched again; failed ones are retried.
+    for msg_id, (status, sent_msg_id) in records.items():
+        if status == "success":
+            downloaded += 1
+            if pin_first and sent_msg_id and (first_pinned is None or msg_id < first_pinned[0]):
+                first_pinned = (msg_id, sent_msg_id)
+        elif status == "skipped":
+            skipped += 1
+    already_processed = downloaded + skipped
+
+    job = jobs.get(job_id)
+    if job:
+        job.progress = lambda: (downloaded + skipped + failed, count)
     
     abort_event = asyncio.Event() # Shared flag to shut everything down
 
-    all_message_ids = list(range(start_id, end_id + 1))
-    chunk_size = 50 # Fetch 50 messages per API call (Instant skipping)
+    def stopping():
+        return abort_event.is_set() or SHUTDOWN_EVENT.is_set()
+
+    def mark_skipped(msg_id):
+        nonlocal skipped
+        skipped += 1
+        journal.record_item(job_id, msg_id, "skipped")
+
+    retry_queue = [] # (messages, bulk groups or None) re-queued after a FloodWait pause
+    retry_counts = {}
+    flood_notice_until = 0
+    flood_pauses = flood_seconds = 0
+
+    # One dashboard message replaces per-item progress messages.
+    transfer_counter = TransferCounter()
+    batch_started = time()
+    dashboard_refresh = asyncio.Event()
+
+    def note_flood_wait(seconds):
+        nonlocal flood_notice_until, flood_pauses, flood_seconds
+        # Items hitting the same pause are counted once.
+        if time() >= flood_notice_until:
+            flood_notice_until = time() + seconds
+            flood_pauses += 1
+            flood_seconds += seconds
+            dashboard_refresh.set()
+
+    def render_dashboard():
+        processed = downloaded + skipped + failed
+        elapsed = max(time() - batch_started, 0.1)
+        rate = (processed - already_processed) / elapsed
+        queued = max(count - processed - sum(len(items) for items in in_flight.values()), 0)
+        eta = get_readable_time(int((count - processed) / rate)) if rate > 0 else "—"
+        flood_text = f"\n⏸️ **FloodWait pauses** : `{flood_pauses}` (`{flood_seconds}s`)" if flood_pauses else ""
+        return (
+            f"📥 **Batch Job `#{job_id}`** (`{start_id}` → `{end_id}`){thread_text}\n"
+            "━━━━━━━━━━━━━━━━━━━\n"
+            f"✅ **Done** : `{downloaded}`  ⏭️ **Skipped** : `{skipped}`  ❌ **Failed** : `{failed}`\n"
+            f"🔄 **In flight** : `{len(in_flight)}`  ⏳ **Queued** : `{queued}`\n"
+            f"📦 **Data** : `{get_readable_file_size(transfer_counter.bytes)}` at `{get_readable_file_size(transfer_counter.bytes / elapsed)}/s`\n"
+            f"⏱️ **Elapsed** : `{get_readable_time(int(elapsed))}`  **ETA** : `{eta}`"
+            f"{flood_text}"
+        )
 
-    for i in range(0, len(all_message_ids), chunk_size):
-        if abort_event.is_set():
-            break
-            
-        chunk = all_message_ids[i:i+chunk_size]
-        
-        try:
+    async def update_dashboard():
+        while True:
+            try:
+                await asyncio.wait_for(dashboard_refresh.wait(), timeout=PyroConf.BATCH_DASHBOARD_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            dashboard_refresh.clear()
+            try:
+                await api_call(bot, "edit", loading.edit, render_dashboard())
+            except MessageNotModified:
+                pass
+            except Exception as e:
+                LOGGER(__name__).info(f"Batch dashboard update failed: {e}")
+
+    async def collect_results(done_tasks):
+        nonlocal downloaded, failed, first_pinned
+        flood_wait = 0
+        for task in done_tasks:
+            items = in_flight.pop(task)
+            groups = bulk_groups.pop(task, None)
+            source_id = items[0].id
+            if task.cancelled():
+                result = "aborted"
+            elif task.exception() is not None:
+                result = task.exception()
+            else:
+                result = task.result()
+
+            status = result.get("status") if isinstance(result, dict) else result
+            if status == "aborted" or abort_event.is_set():
+                pass
+            elif status == "retry" and retry_counts.get(source_id, 0) < PyroConf.FLOOD_WAIT_MAX_RETRIES:
+                # The client is already paused; the item runs again once the pause is over.
+                retry_counts[source_id] = retry_counts.get(source_id, 0) + 1
+                retry_queue.append((items, groups))
+                flood_wait = max(flood_wait, result.get("wait", 0))
+            elif status == "success":
+                sent = result.get("sent") or {item.id: result.get("sent_msg_id") for item in items}
+                # Posts a bulk forward left out entirely are handled one by one instead.
+                unsent = result.get("unsent") or []
+                retry_queue.extend((group, None) for group in unsent)
+                unsent_ids = {item.id for group in unsent for item in group}
+                for item in items:
+                    if item.id in sent:
+                        downloaded += 1
+                        journal.record_item(job_id, item.id, "success", sent[item.id])
+                    elif item.id not in unsent_ids:
+                        # An album member Telegram dropped while forwarding the rest.
+                        failed += 1
+                        journal.record_item(job_id, item.id, "failed")
+                # A post's sent message is the one mapped to its first forwarded source message.
+                for group in (groups or [items]):
+                    sent_msg_id = next((sent[item.id] for item in group if item.id in sent), None)
+                    if pin_first and sent_msg_id and (first_pinned is None or group[0].id < first_pinned[0]):
+                        first_pinned = (group[0].id, sent_msg_id)
+            elif groups:
+                # The bulk forward failed; handle its posts one by one instead.
+                retry_queue.extend((group, None) for group in groups)
+            else:
+                failed += len(items)
+                for item in items:
+                    journal.record_item(job_id, item.id, "failed")
+
+        if flood_wait:
+            note_flood_wait(flood_wait)
+
+    def dispatch(items):
+        # `items` is one post, or every fetched member of one album.
+        url = f"{prefix}/{items[0].id}"
+        task = track_task(handle_download(
+            bot, message, url, 
+            silent=True, 
+            pre_fetched_msg=items[0], 
+            abort_event=abort_event, # Pass the global abort flag
+            destination_chat_id=target_chat_id,
+            force=force,
+            transfer_counter=transfer_counter,
+            job_id=job_id,
+            album=items if items[0].media_group_id else None
+        ))
+        in_flight[task] = items
+
+    async def wait_for_slot():
+        # Sliding window: wait only until *a* slot frees up, not the whole window.
+        while len(in_flight) >= BATCH_SIZE and not stopping():
+            done, _ = await asyncio.wait(in_flight, timeout=1, return_when=asyncio.FIRST_COMPLETED)
+            await collect_results(done)
+
+    def dispatch_bulk(groups):
+        items = [msg for group in groups for msg in group]
+        task = track_task(clone_bulk(
+            bot, message, f"{prefix}/{items[0].id}", groups, target_chat_id,
+            abort_event=abort_event, job_id=job_id
+        ))
+        in_flight[task] = items
+        bulk_groups[task] = groups
+
+    async def dispatch_retries():
+        while retry_queue and not stopping():
+            await wait_for_slot()
+            if stopping():
+                break
+            items, groups = retry_queue.pop(0)
+            if groups:
+                dispatch_bulk(groups)
+            else:
+                dispatch(items)
+
+    async def submit(items) -> bool:
+        await dispatch_retries()
+        await wait_for_slot()
+        if stopping():
+            return False
+        dispatch(items)
+        return True
+
+    # Consecutive posts that can be cloned server-side are forwarded together.
+    bulk = [] # posts waiting for the next bulk clone, each a list of messages
+    bulk_size = PyroConf.BULK_CLONE_SIZE
+
+    def bulk_eligible(items) -> bool:
+        if bulk_size < 2 or not clone_strategy.bulk_strategy(items[0].chat.id, clone_strategy.is_protected(items[0])):
+            return False
+        # Already mirrored posts take the per-post path, which skips them without a call.
+        return force or not journal.get_clone(items[0].chat.id, items[0].id, target_chat_id)
+
+    async def flush_bulk() -> bool:
+        nonlocal bulk
+        groups, bulk = bulk, []
+        if len(groups) < 2:
+            return await submit(groups[0]) if groups else True
+        await dispatch_retries()
+        await wait_for_slot()
+        if stopping():
+            return False
+        dispatch_bulk(groups)
+        return True
+
+    async def enqueue(items) -> bool:
+        if not bulk_eligible(items):
+            return await flush_bulk() and await submit(items)
+        if sum(len(group) for group in bulk) + len(items) > bulk_size:
+            if not await flush_bulk():
+                return False
+        bulk.append(items)
+        return True
+
+    def pending_ids(low, high):
+        # IDs in [low, high] that a previous run did not already finish.
+        return [
+            msg_id for msg_id in range(low, high + 1)
+            if records.get(msg_id, (None,))[0] not in ("success", "skipped")
+        ]
+
+    chunk_size = PyroConf.BATCH_FETCH_CHUNK_SIZE
+
+    # Reader stage: fetch chunks ahead of the workers through a bounded queue,
+    # so metadata reads overlap with media transfers. Each chunk is (ids, messages);
+    # ids without a message in the chunk are deleted or filtered out and get skipped.
+    chunk_queue = asyncio.Queue(maxsize=PyroConf.BATCH_PREFETCH_CHUNKS)
+
+    async def read(fetch):
+        # Chunks rotate across healthy sessions, so the items they carry
+        # (and their downloads) are sharded across accounts too.
+        while True:
+            try:
+                reader = await user_pool.pick(start_chat)
+                return await fetch(reader)
+            except FloodWait as e:
+                if e.value <= PyroConf.FLOOD_WAIT_MAX_PAUSE and not stopping():
+                    note_flood_wait(e.value)
+                    continue # api_call paused the client; read again afterwards
+                return e
+            except Exception as e:
+                return e
+
+    async def fetch_chunks():
+        # Nothing past the chat's newest message exists yet; skip those IDs without reading them.
+        last_id = end_id
+        top_id = await read(lambda reader: api_call(reader, "read", history.get_top_message_id, reader, start_chat))
+        if isinstance(top_id, Exception):
+            LOGGER(__name__).info(f"Could not read the newest message of {start_chat}: {top_id}")
+        elif top_id < end_id:
+            last_id = max(top_id, start_id - 1)
+            await chunk_queue.put((pending_ids(last_id + 1, end_id), []))
+
+        after_id = start_id - 1
+        if PyroConf.BATCH_ENUMERATION == "history":
+            # Walk only messages that exist (or the topic's replies), oldest first.
+            while after_id < last_id and not stopping():
+                page = await read(lambda reader: api_call(
+                    reader, "read", history.get_history_page, reader, start_chat, after_id, last_id, start_thread_id
+                ))
+                if isinstance(page, FloodWait):
+                    await chunk_queue.put((pending_ids(after_id + 1, last_id), page))
+                    after_id = last_id
+                    break
+                if isinstance(page, Exception):
+                    LOGGER(__name__).warning(f"History read failed for {start_chat}, fetching the rest by ID: {page}")
+                    break
+                page_end = page[-1].id if page else last_id
+                chunk = pending_ids(after_id + 1, page_end)
+                wanted = set(chunk)
+                await chunk_queue.put((chunk, [msg for msg in page if msg.id in wanted]))
+                after_id = page_end
+
+        message_ids = pending_ids(after_id + 1, last_id)
+        for i in range(0, len(message_ids), chunk_size):
+            if stopping():
+                break
+            chunk = message_ids[i:i+chunk_size]
             # OPTIMIZATION: Fetch in bulk to save API rate limits!
-            messages_batch = await user.get_messages(chat_id=start_chat, message_ids=chunk)
-        except FloodWait as e:
-            await message.reply(f"🚨 **Batch Halted: Read FloodWait Triggered!**\nWait `{e.value}` seconds.")
-            abort_event.set()
-            break
-        except Exception as e:
-            if "FLOOD_WAIT" in str(e).upper():
-                 await message.reply(f"🚨 **Batch Halted: Read FloodWait Triggered!**")
-                 abort_event.set()
-                 break
-            failed += len(chunk)
-            continue
+            messages_batch = await read(lambda reader: api_call(
+                reader, "read", reader.get_messages, chat_id=start_chat, message_ids=chunk, replies=0
+            ))
+            await chunk_queue.put((chunk, messages_batch))
+        await chunk_queue.put(None)
+
+    reader_task = asyncio.create_task(fetch_chunks())
+    dashboard_task = asyncio.create_task(update_dashboard())
+    album = [] # members of the media group being collected; albums can span chunks
 
-        if getattr(messages_batch, "id", None) is not None:
-             messages_batch = [messages_batch]
+    try:
+        while True:
+            if stopping():
+                break
 
-        for chat_msg in messages_batch:
-            if abort_event.is_set():
+            item = await chunk_queue.get()
+            if item is None:
                 break
+            chunk, messages_batch = item
 
-            if not chat_msg or getattr(chat_msg, 'empty', False):
-                skipped += 1
+            if isinstance(messages_batch, FloodWait):
+                abort_event.set()
+                try:
+                    await api_call(bot, "edit", message.reply, f"🚨 **Batch Halted: Read FloodWait Triggered!**\nWait `{messages_batch.value}` seconds.")
+                except Exception as e:
+                    LOGGER(__name__).info(f"Could not report batch halt: {e}")
+                break
+            elif isinstance(messages_batch, Exception):
+                if "FLOOD_WAIT" in str(messages_batch).upper():
+                     abort_event.set()
+                     try:
+                         await api_call(bot, "edit", message.reply, f"🚨 **Batch Halted: Read FloodWait Triggered!**")
+                     except Exception as e:
+                         LOGGER(__name__).info(f"Could not report batch halt: {e}")
+                     break
+                failed += len(chunk)
+                for msg_id in chunk:
+                    journal.record_item(job_id, msg_id, "failed")
                 continue
 
-            if start_thread_id:
-                msg_thread = getattr(chat_msg, "message_thread_id", None)
-                if msg_thread != start_thread_id:
-                    skipped += 1
+            if getattr(messages_batch, "id", None) is not None:
+                 messages_batch = [messages_batch]
+
+            missing = set(chunk) - {chat_msg.id for chat_msg in messages_batch if chat_msg}
+            if missing:
+                skipped += len(missing)
+                journal.record_items(job_id, sorted(missing), "skipped")
+
+            for chat_msg in messages_batch:
+                if stopping():
+                    break
+
+                if not chat_msg or getattr(chat_msg, 'empty', False):
+                    if chat_msg:
+                        mark_skipped(chat_msg.id)
                     continue
 
-            has_media = bool(chat_msg.media_group_id or chat_msg.media)
-            has_text  = bool(chat_msg.text or chat_msg.caption)
-            if not (has_media or has_text):
-                skipped += 1
-                continue
+                if start_thread_id:
+                    msg_thread = getattr(chat_msg, "message_thread_id", None)
+                    if msg_thread != start_thread_id:
+                        mark_skipped(chat_msg.id)
+                        continue
 
-            url = f"{prefix}/{chat_msg.id}"
-            task = track_task(handle_download(
-                bot, message, url, 
-                silent=False, 
-                pre_fetched_msg=chat_msg, 
-                abort_event=abort_event # Pass the global abort flag
-            ))
-            batch_tasks.append(task)
-
-            if len(batch_tasks) >= BATCH_SIZE:
-                results = await asyncio.gather(*batch_tasks, return_exceptions=True)
-                for result in results:
-                    status = result.get("status") if isinstance(result, dict) else result
-                    if status == "aborted" or abort_event.is_set():
-                        pass 
-                    elif status == "success":
-                        downloaded += 1
-                        if pin_first and first_pinned_msg_id is None and isinstance(result, dict):
-                            first_pinned_msg_id = result.get("sent_msg_id")
-                    else:
-                        failed += 1
-                
-                batch_tasks.clear()
-                if not abort_event.is_set():
-                    await asyncio.sleep(PyroConf.FLOOD_WAIT_DELAY)
+                has_media = bool(chat_msg.media_group_id or chat_msg.media)
+                has_text  = bool(chat_msg.text or chat_msg.caption)
+                if not (has_media or has_text):
+                    mark_skipped(chat_msg.id)
+                    continue
 
-    if batch_tasks and not abort_event.is_set():
-        results = await asyncio.gather(*batch_tasks, return_exceptions=True)
-        for result in results:
-            status = result.get("status") if isinstance(result, dict) else result
-            if status == "aborted" or abort_event.is_set():
+                if album and chat_msg.media_group_id != album[0].media_group_id:
+                    if not await enqueue(album):
+                        break
+                    album = []
+                if chat_msg.media_group_id:
+                    album.append(chat_msg)
+                    continue
+                if not await enqueue([chat_msg]):
+                    break
+
+        if album and not stopping():
+            await enqueue(album)
+        if not stopping():
+            await flush_bulk()
+
+        if not reader_task.done():
+            reader_task.cancel()
+
+        while (in_flight or retry_queue) and not stopping():
+            await dispatch_retries()
+            if in_flight:
+                done, _ = await asyncio.wait(in_flight, timeout=1, return_when=asyncio.FIRST_COMPLETED)
+                await collect_results(done)
+
+        if SHUTDOWN_EVENT.is_set():
+            # Drain what we can; anything unfinished stays pending in the journal.
+            if in_flight:
+                done, pending = await asyncio.wait(in_flight, timeout=PyroConf.SHUTDOWN_DRAIN_TIMEOUT)
+                await collect_results(done)
+                for task in pending:
+                    task.cancel()
+            LOGGER(__name__).info(f"Batch job #{job_id} checkpointed for shutdown.")
+            try:
+                await api_call(bot, "edit", loading.edit, f"⏸️ **Batch Job `#{job_id}` paused for restart.** It will resume automatically.")
+            except Exception:
                 pass
-            elif status == "success":
-                downloaded += 1
-                if pin_first and first_pinned_msg_id is None and isinstance(result, dict):
-                    first_pinned_msg_id = result.get("sent_msg_id")
-            else:
-                failed += 1
+            return
+    except asyncio.CancelledError:
+        # /cancel or /killall: stop everything this batch started; unfinished items stay pending.
+        abort_event.set()
+        reader_task.cancel()
+        for task in in_flight:
+            task.cancel()
+        journal.set_job_status(job_id, journal.JOB_STOPPED)
+        try:
+            await api_call(bot, "edit", loading.edit, f"🛑 **Batch Job `#{job_id}` cancelled.** Use `/resume {job_id}` to continue it later.")
+        except Exception:
+            pass
+        raise
+    finally:
+        dashboard_task.cancel()
+        ACTIVE_BATCHES.pop(job_id, None)
+
+    journal.set_job_status(job_id, journal.JOB_STOPPED if abort_event.is_set() else journal.JOB_COMPLETED)
 
-    await loading.delete()
+    try:
+        await api_call(bot, "edit", loading.delete)
+    except Exception as e:
+        LOGGER(__name__).info(f"Could not delete batch dashboard: {e}")
     
-    completion_text = "**✅ Batch Process Complete!**" if not abort_event.is_set() else "**🛑 Batch Process Stopped (FloodWait)**"
+    completion_text = "**✅ Batch Process Complete!**" if not abort_event.is_set() else f"**🛑 Batch Process Stopped (FloodWait)**\nUse `/resume {job_id}` to continue later."
     
-    if pin_first and first_pinned_msg_id:
+    if pin_first and first_pinned:
         try:
-            target_chat_id = await resolve_target_chat_id(bot, message)
-            await bot.pin_chat_message(target_chat_id, first_pinned_msg_id, disable_notification=True)
+            await api_call(bot, "edit", bot.pin_chat_message, target_chat_id, first_pinned[1], disable_notification=True)
         except Exception as e:
             LOGGER(__name__).info(f"Could not pin first batch post: {e}")
 
-    await message.reply(
+    summary_text = (
         f"{completion_text}\n"
         "━━━━━━━━━━━━━━━━━━━\n"
         f"📥 **Processed** : `{downloaded}`\n"
         f"⏭️ **Skipped** : `{skipped}`\n"
         f"❌ **Failed** : `{failed}`"
     )
+    # The job is already finished in the journal; a failed summary must not fail the batch.
+    for attempt in range(2):
+        try:
+            await api_call(bot, "edit", message.reply, summary_text)
+            break
+        except FloodWait as e:
+            # api_call has paused the bot, so a second attempt waits the FloodWait out.
+            if attempt or e.value > PyroConf.FLOOD_WAIT_MAX_PAUSE:
+                LOGGER(__name__).info(f"Could not send batch summary: {e}")
+                break
+        except Exception as e:
+            LOGGER(__name__).info(f"Could not send batch summary: {e}")
+            break
+
+
+async def resume_job(bot: Client, job, message: Message = None):
+    if message is None:
+        # No live command message after a restart: anchor the resumed batch to a fresh notice.
+        message = await api_call(
+            bot, "edit", bot.send_message,
+            job["request_chat_id"],
+            f"♻️ **Resuming Batch Job `#{job['id']}`** after restart..."
+        )
+    await execute_batch_logic(
+        bot, message, job["start_link"], job["count"],
+        pin_first=bool(job["pin_first"]), job_id=job["id"], force=bool(job["force"])
+    )
+
+
+def submit_job(bot: Client, job, message: Message = None):
+    """Run a journaled batch in the background, its items queued fairly against other users' work."""
+    description = f"{job['start_link']} (+{job['count']})"
+    return track_task(jobs.run(job["id"], job["user_id"], description, resume_job(bot, job, message)))
+
+
+async def resume_unfinished_jobs():
+    for job in journal.get_unfinished_jobs(status=journal.JOB_RUNNING):
+        if jobs.get(job["id"]):
+            continue
+        LOGGER(__name__).info(f"Resuming interrupted batch job #{job['id']}")
+        submit_job(bot, job)
+
+
+@bot.on_message(filters.command("resume") & filters.private)
+async def resume_command(bot: Client, message: Message):
+    resumable = [
+        job for job in journal.get_unfinished_jobs(user_id=message.from_user.id)
+        if not jobs.get(job["id"])
+    ]
+
+    if len(message.command) > 1:
+        if not message.command[1].isdigit():
+            await api_call(bot, "edit", message.reply, "❌ **Usage:** `/resume [job_id]`")
+            return
+        wanted = int(message.command[1])
+        resumable = [job for job in resumable if job["id"] == wanted]
+
+    if not resumable:
+        await api_call(bot, "edit", message.reply, "**No unfinished batch jobs to resume.**")
+        return
+
+    for job in resumable:
+        submit_job(bot, job, message)
+    await api_call(bot, "edit", message.reply, f"♻️ **Resuming {len(resumable)} batch job(s):** " + ", ".join(f"`#{job['id']}`" for job in resumable))
+
+
+@bot.on_message(filters.command("jobs") & filters.private)
+async def jobs_command(_, message: Message):
+    running = jobs.list_jobs(message.from_user.id)
+    if not running:
+        await api_call(bot, "edit", message.reply, "**No background jobs running.**")
+        return
+
+    lines = []
+    for job in running:
+        progress = ""
+        if job.progress:
+            done, total = job.progress()
+            progress = f" · `{done}/{total}`"
+        lines.append(f"• `#{job.id}` {job.description}{progress} · running `{get_readable_time(int(time() - job.started))}`")
+    await api_call(bot, "edit", message.reply,
+        "📋 **Your Background Jobs**\n\n" + "\n".join(lines) + "\n\nUse `/cancel <job_id>` to stop one.",
+        disable_web_page_preview=True
+    )
+
+
+@bot.on_message(filters.command("cancel") & filters.private)
+async def cancel_job(_, message: Message):
+    if len(message.command) < 2 or not message.command[1].isdigit():
+        await api_call(bot, "edit", message.reply, "❌ **Usage:** `/cancel <job_id>`")
+        return
+
+    job_id = int(message.command[1])
+    job = jobs.get(job_id)
+    if not job or job.user_id != message.from_user.id or not jobs.cancel(job_id):
+        await api_call(bot, "edit", message.reply, f"❌ **No running job `#{job_id}`.** See `/jobs`.")
+        return
+    await api_call(bot, "edit", message.reply, f"🛑 **Cancelling job `#{job_id}`.** Use `/resume {job_id}` to continue it later.")
 
 
 @bot.on_message(filters.command("stats") & filters.private)
@@ -686,15 +1452,44 @@ async def stats(_, message: Message):
         f"**➜ Upload:** `{sent}`\n"
         f"**➜ Download:** `{recv}`"
     )
-    await message.reply(stats_msg)
+    await api_call(bot, "edit", message.reply, stats_msg)
+
+
+@bot.on_message(filters.command("perf") & filters.private)
+async def perf_report(_, message: Message):
+    # /perf [jobs]: stage percentiles and the slowest posts of the last few batch jobs.
+    job_count = int(message.command[1]) if len(message.command) > 1 and message.command[1].isdigit() else 5
+    records = perf.recent_records(job_count)
+    if not records:
+        return await api_call(bot, "edit", message.reply, "**No timings recorded yet.**")
+
+    summary = perf.summarize(records)
+    stages = sorted((name for name in summary if name != "total"), key=lambda name: summary[name][2], reverse=True)
+    rows = [f"{'stage':<14}{'n':>6}{'p50':>8}{'p95':>8}{'p99':>8}"]
+    for name in ["total"] + stages:
+        n, p50, p95, p99 = summary[name]
+        rows.append(f"{name:<14}{n:>6}{p50:>7.2f}s{p95:>7.2f}s{p99:>7.2f}s")
+
+    slowest = sorted(records, key=lambda record: record["total"], reverse=True)[:5]
+    slow_lines = []
+    for record in slowest:
+        stage, seconds = max(record["stages"].items(), key=lambda item: item[1], default=("-", 0))
+        slow_lines.append(f"• {record['url']} – `{record['total']:.1f}s` (mostly {stage} `{seconds:.1f}s`)")
+
+    await api_call(bot, "edit", message.reply,
+        f"**📊 Stage timings** (`{len(records)}` posts, last `{job_count}` jobs)\n"
+        "```\n" + "\n".join(rows) + "\n```\n"
+        "**🐢 Slowest posts**\n" + "\n".join(slow_lines),
+        disable_web_page_preview=True
+    )
 
 
 @bot.on_message(filters.command("logs") & filters.private)
 async def logs(_, message: Message):
     if os.path.exists("logs.txt"):
-        await message.reply_document(document="logs.txt", caption="**Logs**")
+        await api_call(bot, "upload", message.reply_document, document="logs.txt", caption="**Logs**")
     else:
-        await message.reply("**Not exists**")
+        await api_call(bot, "edit", message.reply, "**Not exists**")
 
 
 @bot.on_callback_query(filters.regex(r"^pin_decision:(yes|no):(\d+)$"))
@@ -703,33 +1498,33 @@ async def pin_decision_callback(_, query):
     owner_id = int(owner_id_str)
 
     if not query.from_user or query.from_user.id != owner_id:
-        await query.answer("This prompt is not for you.", show_alert=True)
+        await api_call(bot, "edit", query.answer, "This prompt is not for you.", show_alert=True)
         return
 
     prompt = PIN_PROMPTS.get(owner_id)
     if not prompt:
-        await query.answer("This decision prompt is no longer active.", show_alert=True)
+        await api_call(bot, "edit", query.answer, "This decision prompt is no longer active.", show_alert=True)
         return
 
     if prompt.get("done"):
-        await query.answer("Decision already recorded.")
+        await api_call(bot, "edit", query.answer, "Decision already recorded.")
         return
 
     prompt["pin_first"] = choice == "yes"
     await finalize_pin_prompt(owner_id, timed_out=False)
-    await query.answer("Decision saved.")
+    await api_call(bot, "edit", query.answer, "Decision saved.")
 
 
 @bot.on_callback_query(filters.regex("^refresh_progress$"))
 async def refresh_progress_callback(_, query):
     refreshed, remaining = await refresh_progress_message(query.message)
     if refreshed:
-        await query.answer("Progress refreshed.")
+        await api_call(bot, "edit", query.answer, "Progress refreshed.")
     else:
         if remaining:
-            await query.answer(f"Heyy!! Wait for {remaining} sec", show_alert=True)
+            await api_call(bot, "edit", query.answer, f"Heyy!! Wait for {remaining} sec", show_alert=True)
         else:
-            await query.answer("No active progress for this message.", show_alert=True)
+            await api_call(bot, "edit", query.answer, "No active progress for this message.", show_alert=True)
 
 
 @bot.on_message(filters.command("killall") & filters.private)
@@ -742,12 +1537,32 @@ async def cancel_all_tasks(_, message: Message):
         if not task.done():
             task.cancel()
             cancelled += 1
-    await message.reply(f"**Cancelled {cancelled} running task(s).**")
+    await api_call(bot, "edit", message.reply, f"**Cancelled {cancelled} running task(s).**")
 
 
 async def initialize():
-    global download_semaphore
-    download_semaphore = asyncio.Semaphore(PyroConf.MAX_CONCURRENT_DOWNLOADS)
+    reserved = PyroConf.INTERACTIVE_RESERVED_SLOTS
+    STAGES.update({
+        "fetch": Stage("fetch", PyroConf.MAX_CONCURRENT_FETCHES, reserved),
+        "download": Stage("download", PyroConf.MAX_CONCURRENT_DOWNLOADS, reserved),
+        "process": Stage("process", PyroConf.MAX_CONCURRENT_PROCESSING, reserved),
+        "upload": Stage("upload", PyroConf.MAX_CONCURRENT_UPLOADS, reserved),
+        "staged": Stage("staged", PyroConf.MAX_STAGED_FILES, reserved),
+    })
+    metrics.watch_stages(STAGES)
+    metrics.watch_pool(user_pool)
+    metrics.watch_pool(bot_pool)
+    metrics.RUNNING_TASKS.set_function(lambda: len(RUNNING_TASKS))
+    metrics.ACTIVE_BATCHES.set_function(lambda: len(ACTIVE_BATCHES))
+
+
+async def shutdown():
+    # Stop dispatching new batch items and let running batches drain or checkpoint.
+    SHUTDOWN_EVENT.set()
+    if ACTIVE_BATCHES:
+        LOGGER(__name__).info(f"Waiting for {len(ACTIVE_BATCHES)} batch job(s) to checkpoint...")
+        await asyncio.wait(list(ACTIVE_BATCHES.values()), timeout=PyroConf.SHUTDOWN_DRAIN_TIMEOUT + 5)
+    journal.close_db()
 
 
 # -------------------------------------------------------------------------------------
@@ -757,8 +1572,13 @@ async def web_server():
     async def handle(request):
         return web.Response(text="Bot is running!")
 
+    async def handle_metrics(request):
+        body, content_type = metrics.render()
+        return web.Response(body=body, headers={"Content-Type": content_type})
+
     app = web.Application()
     app.router.add_get('/', handle)
+    app.router.add_get('/metrics', handle_metrics)
     runner = web.AppRunner(app)
     await runner.setup()
     site = web.TCPSite(runner, '0.0.0.0', int(os.getenv('PORT', 8080)))
@@ -776,11 +1596,25 @@ if __name__ == "__main__":
         
         loop.run_until_complete(initialize())
         
-        user.start()
+        for client in user_pool.clients:
+            client.start()
         
         loop.run_until_complete(web_server())
         
-        bot.run()
+        bot.start()
+        for client in bot_pool.clients[1:]:
+            client.start()
+        loop.run_until_complete(resume_unfinished_jobs())
+
+        # idle() returns on SIGINT/SIGTERM so batches can checkpoint before the clients stop.
+        loop.run_until_complete(idle())
+        loop.run_until_complete(shutdown())
+
+        for client in bot_pool.clients[1:]:
+            client.stop()
+        bot.stop()
+        for client in user_pool.clients:
+            client.stop()
         
     except KeyboardInterrupt:
         pass